@@ -1,16 +1,13 @@
 import re
 import itertools as it
 import collections as coll
+import collections.abc
 import warnings
 import logging
 import operator as op
 import functools as ft
 import copy
-import sys
 
-if sys.version_info[0] < 3:
-    from itertools import ifilter as filter # old name
-    
 import numpy as np
 
 from pdbx import PdbxReader as Reader
@@ -23,6 +20,12 @@ from fr3d.data import Structure
 """ The set of symbols that mark an operator expression as complex """
 COMPLEX_SYMBOLS = set('()-')
 
+""" The prefix to strip from a block name """
+BLOCK_PREFIX = re.compile(r'^_')
+
+""" The prefix to strip from an item name to get the column name """
+COLUMN_PREFIX = re.compile(r'_.+\.')
+
 
 class MissingBlockException(Exception):
     """This class is raised when trying to get a missing block of data.
@@ -85,56 +88,70 @@ class Cif(object):
         if handle is None and data is None:
             raise ValueError("Must give either handle or data")
         self.pdb = self.data.name
+        self._table_cache = {}
+        self._operator_cache = {}
         self._operators = self.__load_operators__()
         self._assemblies = self.__load_assemblies__()
+        self._all_operators = list(
+            it.chain.from_iterable(self._assemblies.values()))
         self._entities = self.__load_entities__()
+        self._polymer_entities = frozenset(
+            eid for eid, e in self._entities.items() if e['type'] == 'polymer')
+        self._water_entities = frozenset(
+            eid for eid, e in self._entities.items() if e['type'] == 'water')
         self._chem = self.__load_chem_comp__()
         self.logger = logging.getLogger('fr3d.cif.reader.Cif')
 
     def __load_operators__(self):
         operators = {}
-        for oper in self.pdbx_struct_oper_list:
-            oper['matrix'] = [[None] * 3, [None] * 3, [None] * 3]
-            oper['vector'] = [None] * 3
-
-            for row in range(3):
-                oper['vector'][row] = float(oper['vector[%s]' % str(row + 1)])
-
-                for column in range(3):
-                    key = 'matrix[%s][%s]' % (str(row + 1), str(column + 1))
-                    oper['matrix'][row][column] = float(oper[key])
-
-            transform = np.zeros((4, 4))
-            transform[0:3, 0:3] = oper['matrix']
-            transform[0:3, 3] = oper['vector']
-            transform[3, 3] = 1.0
-
-            oper['matrix'] = np.array(oper['matrix'])
-            oper['vector'] = np.array(oper['vector'])
-            oper['transform'] = np.array(transform)
+        for row in self.pdbx_struct_oper_list:
+            oper = dict(row)
+            oper['matrix'] = np.array([
+                [float(oper['matrix[%d][%d]' % (r, c)]) for c in range(1, 4)]
+                for r in range(1, 4)
+            ])
+            oper['vector'] = np.array([
+                float(oper['vector[%d]' % r]) for r in range(1, 4)
+            ])
+            oper['transform'] = self.__transform__(oper['matrix'],
+                                                   oper['vector'])
 
             operators[oper['id']] = oper
 
         identity = self.__identity_operator__()
         operators[identity['id']] = identity
 
+        for oper in operators.values():
+            oper['resolved_name'] = self.__symmetry_name__(oper)
+
         return operators
 
     def __identity_operator__(self):
         mat = np.identity(3)
         vector = np.array([1, 1, 1])
-        trans = np.zeros((4, 4))
-        trans[0:3, 0:3] = mat
-        trans[0:3, 3] = vector
-        trans[3, 3] = 1.0
         return {
             'id': 'I',
             'name': 'I',
             'vector': vector,
             'matrix': mat,
-            'transform': trans
+            'transform': self.__transform__(mat, vector)
         }
 
+    def __transform__(self, matrix, vector):
+        """Build the 4x4 homogeneous transformation matrix for an operator.
+        This is only kept for callers that want the combined form, atoms are
+        transformed using the 3x3 matrix and the vector directly.
+
+        :matrix: The 3x3 rotation matrix.
+        :vector: The translation vector.
+        :returns: A 4x4 numpy array.
+        """
+        transform = np.zeros((4, 4))
+        transform[0:3, 0:3] = matrix
+        transform[0:3, 3] = vector
+        transform[3, 3] = 1.0
+        return transform
+
     def __load_assemblies__(self):
         assemblies = coll.defaultdict(list)
         for assembly in self.pdbx_struct_assembly_gen:
@@ -214,20 +231,36 @@ class Cif(object):
         the unit id.
         """
 
-        chain_compare = ft.partial(op.eq, chain)
-        if isinstance(chain, (list, tuple, set)):
-            chain_compare = ft.partial(op.contains, set(chain))
+        # Chain ids are compared once per residue and once per sequence row,
+        # so use the cheapest comparison for the request: an equality test
+        # for a single chain, set membership only for several chains. This
+        # uses op.eq rather than str.__eq__, which gives the truthy
+        # NotImplemented for a chain id that is not a string.
+        if isinstance(chain, (list, tuple, set, frozenset)):
+            chain = frozenset(chain)
+            if len(chain) == 1:
+                chain, = chain
+        if isinstance(chain, frozenset):
+            chain_compare = chain.__contains__
+        else:
+            chain_compare = ft.partial(op.eq, chain)
 
         pdb = self.data.name
         mapping = coll.defaultdict(list)
-        for residue in self.__residues__(pdb):
-            if chain_compare(residue.chain):
-                key = (residue.chain, residue.number, residue.insertion_code)
-                mapping[key].append(residue.unit_id())
+        for residue in self.__residues__(pdb, chain_filter=chain_compare):
+            key = (residue.chain, residue.number, residue.insertion_code)
+            mapping[key].append(residue.unit_id())
         mapping = dict(mapping)
 
+        # Select the rows for the requested chains with a single mask over the
+        # strand id column, rather than testing each row.
         entries = self.pdbx_poly_seq_scheme
-        filtered = [r for r in entries if chain_compare(r['pdb_strand_id'])]
+        strands = np.asarray(entries.column('pdb_strand_id'), dtype=str)
+        if isinstance(chain, frozenset):
+            selected = np.isin(strands, list(chain))
+        else:
+            selected = strands == chain
+        filtered = [entries[i] for i in np.flatnonzero(selected).tolist()]
 
         # So in some structures, such as 4X4N, there is more than one entry for
         # the same seq id but with a different sequence, ie, position 29 has
@@ -316,13 +349,13 @@ class Cif(object):
             common = alt_ids.pop(None)
             for alt_id, specific_atoms in list(alt_ids.items()):
                 for common_atom in common:
-                    copied = copy.deepcopy(common_atom)
+                    copied = copy.copy(common_atom)
                     copied.alt_id = alt_id
                     specific_atoms.append(copied)
 
         return sorted(list(alt_ids.values()), key=ordering_key)
 
-    def __residues__(self, pdb):
+    def __residues__(self, pdb, chain_filter=None):
         key = op.attrgetter(
             'pdb',
             'model',
@@ -332,10 +365,15 @@ class Cif(object):
             'insertion_code',
             'symmetry',
         )
-        mapping = it.groupby(sorted(self.__atoms__(pdb), key=key), key)
 
-        for comp_id, all_atoms in mapping:
-            for atoms in self.__group_alt_atoms__(list(all_atoms)):
+        # Atoms are grouped in the order their residues are first seen, this
+        # does not require the atoms of a residue to be adjacent in the file.
+        mapping = coll.OrderedDict()
+        for atom in self.__atoms__(pdb, chain_filter=chain_filter):
+            mapping.setdefault(key(atom), []).append(atom)
+
+        for comp_id, all_atoms in mapping.items():
+            for atoms in self.__group_alt_atoms__(all_atoms):
                 first = atoms[0]
                 type = self._chem.get(first.component_id, {})
                 type = type.get('type', None)
@@ -358,62 +396,48 @@ class Cif(object):
                     polymeric=first.polymeric,
                 )
 
-    def __atoms__(self, pdb):
-        max_operators = max(len(op) for op in list(self._assemblies.values()))
+    def __atoms__(self, pdb, chain_filter=None):
+        """Create all atoms in the structure, with one atom for each
+        symmetry operator that applies to an atom_site row.
+
+        :pdb: The pdb id to give the atoms.
+        :chain_filter: An optional function of the author chain id, rows it
+        rejects are skipped before any Atom is built for them.
+        """
 
-        if not max_operators:
+        if not self._all_operators:
             raise ValueError("Could not find any operators")
 
-        def operator(entry):
-            pdb, atom, number = entry
-            operators = self.operators(atom['label_asym_id'])
+        atom_site = self.atom_site
+        asym_ids = atom_site.column('label_asym_id')
+        chains = atom_site.column('auth_asym_id')
+        coordinates = self.__apply_symmetry__(atom_site)
+        models = atom_site.int_column('pdbx_PDB_model_num').tolist()
+        numbers = atom_site.int_column('auth_seq_id').tolist()
+        indexes = [int(i) if i and i != '.' else None
+                   for i in atom_site.column('label_seq_id')]
+
+        pair = 0
+        for row, atom in enumerate(atom_site):
+            operators = self.operators(asym_ids[row])
             if not operators:
                 self.logger.warning("No operator found for %s", atom)
-                return None
-            if number < len(operators):
-                return pdb, atom, operators[number]
-            return None
-
-        atoms = []
-        if sys.version_info[0] < 3:
-            for index in xrange(max_operators):
-                indexes = it.repeat(index, len(self.atom_site))
-                pdbs = it.repeat(pdb, len(self.atom_site))
-                zipped = it.izip(pdbs, self.atom_site, indexes)
-                with_operators = it.imap(operator, zipped)
-                filtered = filter(None, with_operators)
-                atoms.append(it.imap(lambda a: self.__atom__(*a), filtered))
-        else:
-            for index in range(max_operators):
-                indexes = it.repeat(index, len(self.atom_site))
-                pdbs = it.repeat(pdb, len(self.atom_site))
-                zipped = list(zip(pdbs, self.atom_site, indexes))
-                with_operators = list(map(operator, zipped))
-                #print(zipped)
-                #print("<" + ",".join(zipped) + ">")                
-                #print("ZIPPED VALUES")
-                #for val in zipped:
-                    #print(("\t" + str(val)))
-                #print("WITH_OPERATORS VALUES")
-                #for val in with_operators:
-                    #print(("\t" + str(val)))
-                #print("<" + ",".join(with_operators) + ">")
-                filtered = [_f for _f in with_operators if _f]
-                atoms.append([self.__atom__(*a) for a in filtered])
-                
-        return it.chain.from_iterable(atoms)
-
-    def __atom__(self, pdb, atom, symmetry):
-        x, y, z = self.__apply_symmetry__(atom, symmetry)
-
-        index = atom['label_seq_id']
-        if index and index != '.':
-            index = int(index)
-        else:
-            index = None
+                continue
 
-        symmetry_name = self.__symmetry_name__(symmetry)
+            if chain_filter is not None and not chain_filter(chains[row]):
+                pair += len(operators)
+                continue
+
+            # each atom gets its own copy of its row, so the component it
+            # goes into can take it over and this array can be freed
+            for symmetry in operators:
+                yield self.__atom__(pdb, atom, symmetry,
+                                    coordinates[pair].copy(),
+                                    models[row], numbers[row], indexes[row])
+                pair += 1
 
+    def __atom__(self, pdb, atom, symmetry, coordinates, model, number,
+                 index):
         ins_code = atom['pdbx_PDB_ins_code']
         if ins_code == '?':
             ins_code = None
@@ -423,27 +447,59 @@ class Cif(object):
             alt_id = None
 
         return Atom(pdb=pdb,
-                    model=int(atom['pdbx_PDB_model_num']),
+                    model=model,
                     chain=atom['auth_asym_id'],
                     component_id=atom['label_comp_id'],
-                    component_number=int(atom['auth_seq_id']),
+                    component_number=number,
                     component_index=index,
                     insertion_code=ins_code,
                     alt_id=alt_id,
-                    x=x, y=y, z=z,
+                    coordinates=coordinates,
                     group=atom['group_PDB'],
                     type=atom['type_symbol'],
                     name=atom['label_atom_id'],
-                    symmetry=symmetry_name,
+                    symmetry=symmetry['resolved_name'],
                     polymeric=self.is_polymeric_atom(atom))
 
-    def __apply_symmetry__(self, atom, symmetry):
-        coords = [float(atom['Cartn_x']),
-                  float(atom['Cartn_y']),
-                  float(atom['Cartn_z']),
-                  1.0]
-        result = np.dot(symmetry['transform'], np.array(coords))
-        return result[0:3].T
+    def __apply_symmetry__(self, atom_site):
+        """Apply every symmetry operator to the coordinates of the atoms that
+        use it. The coordinates are parsed once into an (N, 3) array and each
+        operator is applied to all of its atoms in a single matrix multiply.
+
+        :atom_site: The atom_site table to transform.
+        :returns: An (M, 3) array with one row of transformed coordinates for
+        each pair of atom and operator. Rows are in the order __atoms__
+        produces atoms, that is by row in atom_site and then by operator.
+        """
+
+        xyz = np.column_stack([atom_site.float_column('Cartn_x'),
+                               atom_site.float_column('Cartn_y'),
+                               atom_site.float_column('Cartn_z')])
+
+        ids = list(self._operators.keys())
+        position = dict((operator_id, k) for k, operator_id in enumerate(ids))
+        rotations = np.array([self._operators[i]['matrix'] for i in ids])
+        translations = np.array([self._operators[i]['vector'] for i in ids])
+
+        asym_ids = atom_site.column('label_asym_id')
+        by_asym = {}
+        for asym_id in set(asym_ids):
+            operators = self.operators(asym_id)
+            by_asym[asym_id] = [position[s['id']] for s in operators]
+
+        per_row = [by_asym[asym_id] for asym_id in asym_ids]
+        counts = np.fromiter((len(k) for k in per_row), dtype=np.intp,
+                             count=len(per_row))
+        rows = np.repeat(np.arange(len(per_row)), counts)
+        kinds = np.fromiter(it.chain.from_iterable(per_row), dtype=np.intp,
+                            count=int(counts.sum()))
+
+        transformed = np.empty((len(rows), 3))
+        for kind in np.unique(kinds):
+            pairs = kinds == kind
+            transformed[pairs] = np.dot(xyz[rows[pairs]], rotations[kind].T) + \
+                translations[kind]
+        return transformed
 
     def __symmetry_name__(self, symmetry):
         symmetry_name = symmetry.get('name')
@@ -452,20 +508,41 @@ class Cif(object):
         return symmetry_name
 
     def table(self, name):
-        return Table(self, self.__block__(name))
+        """Get the table with the given name. Each table is only built once
+        and then cached.
+
+        :name: The name of the table, with or without a leading underscore.
+        :returns: The Table.
+        """
+        block_name = BLOCK_PREFIX.sub('', name)
+        if block_name not in self._table_cache:
+            table = Table(self, self.__block__(block_name))
+            self._table_cache[block_name] = table
+        return self._table_cache[block_name]
 
     def has_table(self, name):
-        block_name = re.sub('^_', '', name)
+        block_name = BLOCK_PREFIX.sub('', name)
         block = self.data.get_object(block_name)
         return bool(block)
 
     def operators(self, asym_id):
+        """Get the unique symmetry operators which apply to the given asym id.
+        The result is computed once per asym id and cached.
+
+        :asym_id: The asym id to get operators for.
+        :returns: A list of the operators.
+        """
+        if asym_id not in self._operator_cache:
+            self._operator_cache[asym_id] = self.__operators__(asym_id)
+        return self._operator_cache[asym_id]
+
+    def __operators__(self, asym_id):
         assemblies = self._assemblies[asym_id]
         if not assemblies:
             self.logger.warning("Asym id %s.%s is not part of any assemblies."
                                 " Defaulting to all operators",
                                 self.pdb, asym_id)
-            assemblies = it.chain.from_iterable(list(self._assemblies.values()))
+            assemblies = self._all_operators
 
         seen = set()
         matching = []
@@ -476,16 +553,16 @@ class Cif(object):
         return matching
 
     def is_water(self, entity_id):
-        return self._entities[entity_id]['type'] == 'water'
+        return entity_id in self._water_entities
 
     def is_polymeric(self, entity_id):
-        return self._entities[entity_id]['type'] == 'polymer'
+        return entity_id in self._polymer_entities
 
     def is_polymeric_atom(self, atom):
-        return self.is_polymeric(atom['label_entity_id'])
+        return atom['label_entity_id'] in self._polymer_entities
 
     def __block__(self, name):
-        block_name = re.sub('^_', '', name)
+        block_name = BLOCK_PREFIX.sub('', name)
         block = self.data.get_object(block_name)
         if not block:
             raise MissingBlockException("Unknown block " + name)
@@ -498,36 +575,87 @@ class Cif(object):
             raise AttributeError("Unknown block " + name)
 
 
+class Row(coll.abc.Mapping):
+    """A read only view of a single row in a Table. This behaves like a dict
+    of the form { attribute: value } but does not copy any of the data out of
+    the table.
+    """
+
+    __slots__ = ('_data', '_index')
+
+    def __init__(self, data, index):
+        self._data = data
+        self._index = index
+
+    def __getitem__(self, name):
+        return self._data[name][self._index]
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self):
+        return len(self._data)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
 class Table(object):
 
     """Container for a single table in the data block. This provides some
-    useful methods for accessing the data.
+    useful methods for accessing the data. The data is stored by column, rows
+    are only created as views into the columns when requested.
     """
 
-    def __init__(self, cif, block, rows=None):
+    def __init__(self, cif, block, data=None):
         self._cif = cif
         self.block = block
-        self.rows = rows
 
         self.columns = self.block.item_name_list
-        self.columns = [re.sub('_.+\.', '', name) for name in self.columns]
+        self.columns = [COLUMN_PREFIX.sub('', name) for name in self.columns]
 
-        if self.rows is None:
-            length = self.block.row_count
-            if sys.version_info[0] < 3:
-                self.rows = [self.__row__(index) for index in xrange(length)]
-            else:
-                self.rows = [self.__row__(index) for index in range(length)]
+        if data is None:
+            values = list(zip(*self.block.row_list))
+            if not values:
+                values = [()] * len(self.columns)
+            data = dict(zip(self.columns, [list(v) for v in values]))
+
+        self._data = data
+        self._typed = {}
+        self._length = 0
+        if self.columns:
+            self._length = len(self._data[self.columns[0]])
+
+    @property
+    def rows(self):
+        """Get a list of all rows in this table. Each row is a view as produced
+        by __row__.
+        """
+        return [self.__row__(index) for index in range(len(self))]
 
     def column(self, name):
         """Get a column by name"""
-        if name not in self.columns:
+        if name not in self._data:
             raise MissingColumn("Unknown column")
+        return self._data[name]
 
-        values = []
-        for row in self.rows:
-            values.append(row[name])
-        return values
+    def float_column(self, name):
+        """Get a column by name as a numpy array of floats. The array is
+        computed once and cached.
+        """
+        return self.__typed_column__(name, np.float64)
+
+    def int_column(self, name):
+        """Get a column by name as a numpy array of ints. The array is
+        computed once and cached.
+        """
+        return self.__typed_column__(name, np.int64)
+
+    def __typed_column__(self, name, dtype):
+        key = (name, dtype)
+        if key not in self._typed:
+            self._typed[key] = np.asarray(self.column(name), dtype=dtype)
+        return self._typed[key]
 
     def size(self):
         """Get a tuple of (rowCount, columnCount).
@@ -537,10 +665,15 @@ class Table(object):
     def __row__(self, number):
         """Get a row by index. Note that this may or may not be in the same
         order as they appear in the cif file, since cif files are not required
-        to be ordered. The row will be a dict of the form { attribute: value }.
-        Each attribute will have the name of the block stripped.
+        to be ordered. The row will be a dict like view of the form
+        { attribute: value }. Each attribute will have the name of the block
+        stripped.
         """
-        return dict(list(zip(self.columns, self.block.row_list[number])))
+        if number < 0:
+            number += len(self)
+        if number < 0 or number >= len(self):
+            raise IndexError("Row index out of range")
+        return Row(self._data, number)
 
     def __getattr__(self, name):
         """Get the column with the given name.
@@ -558,14 +691,19 @@ class Table(object):
                 raise KeyError("Unknown column: %s" % index)
 
         if isinstance(index, int):
-            return self.rows[index]
+            return self.__row__(index)
 
         if isinstance(index, slice):
-            return Table(self._cif, self.block, rows=self.rows[index])
+            data = dict((k, v[index]) for k, v in self._data.items())
+            return Table(self._cif, self.block, data=data)
 
         raise TypeError("Unknown key type, should be str, int or slice")
 
+    def __iter__(self):
+        for index in range(len(self)):
+            yield Row(self._data, index)
+
     def __len__(self):
         """Get the number of rows.
         """
-        return len(self.rows)
+        return self._length
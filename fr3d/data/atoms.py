@@ -12,17 +12,26 @@ class Atom(object):
     and the unit id of the component it belongs to.
     """
 
+    # many atoms are created per structure, so skip the per instance dict
+    __slots__ = ('pdb', 'model', 'chain', 'component_id', 'component_number',
+                 'component_index', 'insertion_code', 'alt_id',
+                 '_coordinates', 'group', 'type', 'name', 'symmetry',
+                 'polymeric')
+
     def __init__(self, pdb=None, model=None, chain=None,
                  component_id=None, component_number=None,
                  component_index=None, insertion_code=None, alt_id=None,
                  x=None, y=None, z=None, group=None, type=None, name=None,
-                 symmetry=None, polymeric=None):
+                 symmetry=None, polymeric=None, coordinates=None):
 
         """Create a new Atom.
 
         :param string pdb: The pdb id this atom is a part of.
         :param int model: The model this atom is a part of.
         :param string chain: The chain this atom is a part of.
+        :param coordinates: An array of the x, y, z coordinates to use instead
+        of x, y and z. This may be a row of a larger array, in which case the
+        atom reads and writes its coordinates through it.
         """
 
         self.pdb = pdb
@@ -33,15 +42,42 @@ class Atom(object):
         self.component_index = component_index
         self.insertion_code = insertion_code
         self.alt_id = alt_id
-        self.x = x
-        self.y = y
-        self.z = z
+        if coordinates is None:
+            if x is None or y is None or z is None:
+                coordinates = np.array([x, y, z], dtype=object)
+            else:
+                coordinates = np.array([x, y, z], dtype=float)
+        self._coordinates = coordinates
         self.group = group
         self.type = type
         self.name = name
         self.symmetry = symmetry
         self.polymeric = polymeric
 
+    @property
+    def x(self):
+        return self._coordinates[0]
+
+    @x.setter
+    def x(self, value):
+        self._coordinates[0] = value
+
+    @property
+    def y(self):
+        return self._coordinates[1]
+
+    @y.setter
+    def y(self, value):
+        self._coordinates[1] = value
+
+    @property
+    def z(self):
+        return self._coordinates[2]
+
+    @z.setter
+    def z(self, value):
+        self._coordinates[2] = value
+
     def component_unit_id(self):
         """Generate the unit id of the component this atom belongs to.
 
@@ -85,8 +121,17 @@ class Atom(object):
         """
 
         result = np.dot(transform, np.array([self.x, self.y, self.z, 1.0]))
-        x, y, z = result[0:3].T
-        return Atom(x=x, y=y, z=z,
+        return self.with_coordinates(result[0:3].copy())
+
+    def with_coordinates(self, coordinates):
+        """Create a new atom which is the same as this one, except at the
+        given coordinates.
+
+        :coordinates: An array of the x, y, z coordinates of the new atom.
+        :returns: The new Atom.
+        """
+
+        return Atom(coordinates=coordinates,
                     pdb=self.pdb,
                     model=self.model,
                     chain=self.chain,
@@ -106,7 +151,39 @@ class Atom(object):
 
         :returns: A numpy array of the x, y, z coordinates.
         """
-        return np.array([self.x, self.y, self.z])
+        return np.array(self._coordinates)
+
+    @classmethod
+    def from_arrays(cls, coordinates, atoms):
+        """Create many atoms at once, each the same as one of the given atoms
+        except at a new position. This is what calling with_coordinates on
+        each atom does, but without going through __init__ for every atom.
+
+        :coordinates: An (N, 3) array of the new coordinates, each atom gets
+        a copy of its row, so a Component made from them can own them.
+        :atoms: The N atoms to copy everything else from.
+        :returns: A list of the new Atoms.
+        """
+
+        created = []
+        for atom, row in zip(atoms, coordinates):
+            new = cls.__new__(cls)
+            new.pdb = atom.pdb
+            new.model = atom.model
+            new.chain = atom.chain
+            new.component_id = atom.component_id
+            new.component_number = atom.component_number
+            new.component_index = atom.component_index
+            new.insertion_code = atom.insertion_code
+            new.alt_id = atom.alt_id
+            new._coordinates = row.copy()
+            new.group = atom.group
+            new.type = atom.type
+            new.name = atom.name
+            new.symmetry = atom.symmetry
+            new.polymeric = atom.polymeric
+            created.append(new)
+        return created
 
     def distance(self, atom):
         """Compute the distance between this atom and another atom.
@@ -4,10 +4,6 @@ on, such as Atoms and Components.
 """
 
 import collections.abc as col
-import sys 
-if sys.version_info[0] < 3:
-    from itertools import ifilter as filter    # old name
-
 import operator as op
 
 import numpy as np
@@ -84,6 +80,40 @@ class AtomProxy(col.MutableMapping):
         self._atoms = atoms
         self._data = {}
         self._definitions = {}
+        self._coordinates = None
+        self._names = None
+        self._bound = None
+        self._rows = None
+
+    def setcoordinates(self, coordinates, names):
+        """Give the coordinates of all atoms as one array, so atoms can be
+        found by name through an index instead of scanning every atom. The
+        index is built on the first lookup, and only used while the atoms are
+        the same ones, in the same order, as when this was called. Adding,
+        removing or replacing atoms without calling this again is still safe.
+
+        :coordinates: A (N, 3) numpy array with a row for each atom, in order,
+        or None to always scan the atoms.
+        :names: The name of each atom, in the same order.
+        """
+
+        self._coordinates = coordinates
+        self._names = names
+        self._bound = list(self._atoms) if coordinates is not None else None
+        self._rows = None
+
+    def __row_index__(self):
+        # comparing the lists checks each atom by identity, as atoms do not
+        # define equality
+        if self._bound is None or self._atoms != self._bound:
+            return None
+
+        if self._rows is None:
+            rows = {}
+            for row, name in enumerate(self._names):
+                rows[name] = rows.get(name, ()) + (row,)
+            self._rows = rows
+        return self._rows
 
     def define(self, name, atoms):
         """Define a center to be computed later. This will make it possible to
@@ -95,17 +125,11 @@ class AtomProxy(col.MutableMapping):
         """
 
         self._definitions[name] = atoms
-        
-        if sys.version_info[0] < 3:
-            if isinstance(atoms, basestring):
-                self._data[name] = set([atoms])
-            else:
-                self._data[name] = set(atoms)
+
+        if isinstance(atoms, str):
+            self._data[name] = set([atoms])
         else:
-            if isinstance(atoms, str):
-                self._data[name] = set([atoms])
-            else:
-                self._data[name] = set(atoms)
+            self._data[name] = set(atoms)
 
     def setcenter(self, name, vector):
         """Explicitly set the name and the value of a center.
@@ -144,9 +168,58 @@ class AtomProxy(col.MutableMapping):
         """
         return self.__handle_key__(names, allow_missing=allow_missing)
 
+    def bulk(self, names):
+        """Lookup several centers at once. Each name is resolved as it would be
+        by indexing, but the atoms are only scanned once for all names. Unlike
+        indexing, a name with no atoms is an error instead of giving an empty
+        array.
+
+        :names: The names of the centers to get.
+        :returns: A (k, 3) numpy array with the center for each name, in order.
+        """
+
+        wanted = set(name for name in names if name not in self._data)
+        found = {}
+        rows = self.__row_index__()
+        if rows is not None:
+            for name in wanted:
+                if name in rows:
+                    found[name] = [self._coordinates[row] for row in rows[name]]
+        else:
+            for atom in self._atoms:
+                if atom.name in wanted:
+                    found.setdefault(atom.name, []).append(atom.coordinates())
+
+        centers = np.empty((len(names), 3))
+        for position, name in enumerate(names):
+            if name in self._data:
+                center = self[name]
+            elif name not in found:
+                center = []
+            elif len(found[name]) == 1:
+                center = found[name][0]
+            else:
+                center = np.average(found[name], axis=0)
+
+            if not len(center):
+                raise KeyError("Missing coordinates for: %s" % name)
+            centers[position] = center
+        return centers
+
     def __coordinates__(self, names, allow_missing=True):
         coords = []
-        if names == set('*'):
+        index = self.__row_index__()
+        if index is not None:
+            if names == set('*'):
+                rows = range(len(self._coordinates))
+            elif len(names) == 1:
+                rows = index.get(next(iter(names)), ())
+            else:
+                rows = [row for row, name in enumerate(self._names)
+                        if name in names]
+            # copy the rows so callers cannot move the atoms by accident
+            coords = [self._coordinates[row].copy() for row in rows]
+        elif names == set('*'):
             coords = [atom.coordinates() for atom in self._atoms]
         else:
             coords = [a.coordinates() for a in self._atoms if a.name in names]
@@ -194,6 +267,10 @@ class AtomProxy(col.MutableMapping):
         if key in self._data or key == '*':
             return True
 
+        index = self.__row_index__()
+        if index is not None:
+            return key in index
+
         for atom in self._atoms:
             if atom.name == key:
                 return True
@@ -2,27 +2,68 @@ from fr3d.data.base import EntitySelector
 from fr3d.data.base import AtomProxy
 from fr3d.data.atoms import Atom
 from fr3d import definitions as defs
-from fr3d.geometry.superpositions import besttransformation
+from fr3d.geometry.superpositions import best_rotation_only
 from fr3d.geometry import angleofrotation as angrot
+import math
 import numpy as np
-import sys
+from scipy import spatial as sp
 from fr3d.unit_ids import encode
 
 NHBondLength=1
 
+"""The coordinates of the atoms of each standard base in the standard base
+frame, stacked into an (N, 3) array, along with the row of each atom name."""
+NA_BASE_COORDINATES = dict(
+    (sequence, (dict((name, row) for row, name in enumerate(coordinates)),
+                np.array(list(coordinates.values()), dtype=np.float64)))
+    for sequence, coordinates in defs.NAbasecoordinates.items())
+
+"""The names of the hydrogens of each standard base, and their coordinates in
+the standard base frame stacked into an (H, 3) array, so all hydrogens of a
+base can be placed with a single matrix multiply."""
+NA_HYDROGENS = dict(
+    (sequence, (names, np.array([defs.NAbasecoordinates[sequence][name]
+                                 for name in names])))
+    for sequence, names in defs.NAbasehydrogens.items())
+
+# These helpers work on single 3-vectors, where the fixed cost of calling
+# np.linalg.norm or np.cross is far larger than the arithmetic, so they use
+# scalar math instead.
 def unit_vector(v):
+    if isinstance(v, np.ndarray) and v.shape == (3,):
+        x, y, z = v.tolist()
+        return v / math.sqrt(x * x + y * y + z * z)
     return v / np.linalg.norm(v)
 
+# This function calculates the cross product of two 3-vectors
+def cross_product(a, b):
+    ax, ay, az = np.ravel(a).tolist()
+    bx, by, bz = np.ravel(b).tolist()
+    return np.array([ay * bz - az * by, az * bx - ax * bz, ax * by - ay * bx])
+
 # This function calculates an angle from 0 to 180 degrees between two vectors
 def angle_between_vectors(vec1, vec2):
     if len(vec1) == 3 and len(vec2) == 3:
-        cosang = np.dot(vec1, vec2)
-        sinang = np.linalg.norm(np.cross(vec1, vec2))
-        angle = np.arctan2(sinang, cosang)
+        x1, y1, z1 = vec1
+        x2, y2, z2 = vec2
+        cosang = x1 * x2 + y1 * y2 + z1 * z2
+        sinang = math.sqrt((y1 * z2 - z1 * y2) ** 2 +
+                           (z1 * x2 - x1 * z2) ** 2 +
+                           (x1 * y2 - y1 * x2) ** 2)
+        angle = math.atan2(sinang, cosang)
         return 180*angle/np.pi
     else:
         return None
 
+# This function calculates the angles from 0 to 180 degrees between matching
+# rows of two (..., 3) arrays of vectors
+def angle_between_vectors_batched(vecs1, vecs2):
+    vecs1 = np.asarray(vecs1, dtype=np.float64)
+    vecs2 = np.asarray(vecs2, dtype=np.float64)
+    cosang = np.einsum('...i,...i->...', vecs1, vecs2)
+    sinang = np.linalg.norm(np.cross(vecs1, vecs2), axis=-1)
+    return np.degrees(np.arctan2(sinang, cosang))
+
 # This function calculates an angle from 0 to 180 degrees between two vectors
 def angle_between_three_points(P1,P2,P3):
     if len(P1) == 3 and len(P2) == 3 and len(P3) == 3:
@@ -30,78 +71,358 @@ def angle_between_three_points(P1,P2,P3):
     else:
         return None
 
+"""The sine of 120 degrees, used by rotate_120."""
+SIN_120 = math.sqrt(3) / 2
+
+# The hydrogen placing functions below are called for every amino acid, so
+# they unpack their points into Python floats and only build arrays for the
+# positions they return.
+def scalar_unit_vector(x, y, z):
+    length = math.sqrt(x * x + y * y + z * z)
+    if not length:
+        # like dividing arrays by a zero norm, coincident atoms give nan
+        return math.nan, math.nan, math.nan
+    return x / length, y / length, z / length
+
+def rotate_120(axis, v):
+    """Rotate v by 120 degrees around axis in both directions, using the
+    closed form of Rodrigues' formula, R v = v + sin(t) u x v +
+    (1 - cos(t)) (u (u . v) - v), with sin(t) = sqrt(3)/2 and
+    1 - cos(t) = 3/2.
+
+    :axis: The x, y, z of the vector to rotate around, it need not have unit
+    length.
+    :v: The x, y, z of the vector to rotate.
+    :returns: A pair of the x, y, z of v rotated by 120 and by -120 degrees.
+    """
+
+    ux, uy, uz = scalar_unit_vector(*axis)
+    vx, vy, vz = v
+    s = SIN_120
+    d = ux * vx + uy * vy + uz * vz
+    cx, cy, cz = uy * vz - uz * vy, uz * vx - ux * vz, ux * vy - uy * vx
+    bx = vx + 1.5 * (ux * d - vx)
+    by = vy + 1.5 * (uy * d - vy)
+    bz = vz + 1.5 * (uz * d - vz)
+    return ((bx + s * cx, by + s * cy, bz + s * cz),
+            (bx - s * cx, by - s * cy, bz - s * cz))
+
+def apply_3x3(matrix, v):
+    """Multiply a 3x3 matrix by a 3-vector. The product is written out in
+    scalar arithmetic, which is several times faster than np.dot for a
+    single vector.
+
+    :matrix: The 3x3 matrix, as an array or np.matrix.
+    :v: The vector to multiply, of any shape with 3 entries.
+    :returns: The product as an array of shape (3,).
+    """
+
+    (a, b, c), (d, e, f), (g, h, i) = np.asarray(matrix).tolist()
+    x, y, z = np.ravel(v).tolist()
+    return np.array([a * x + b * y + c * z,
+                     d * x + e * y + f * z,
+                     g * x + h * y + i * z])
+
 # return positions of hydrogens making a tetrahedron with center C and vertices P1 and P2
 def pyramidal_hydrogens(P1,C,P2,bondLength=1):
+    P1 = np.ravel(P1).tolist()
+    C = np.ravel(C).tolist()
+    P2 = np.ravel(P2).tolist()
+
+    def vertex(v):
+        return [c + bondLength * u for c, u in zip(C, scalar_unit_vector(*v))]
+
+    # infer positions one way, the remaining vertices are the vector from C
+    # to P1 rotated 120 degrees in either direction around the vector P2->C
+    V3, V4 = rotate_120([c - p for c, p in zip(C, P2)],
+                        [p - c for c, p in zip(C, P1)])
+    V3, V4 = vertex(V3), vertex(V4)
 
-    # infer positions one way
-    V1 = P1
-    V2 = P2
-    # vector from V2 to C
-    u = unit_vector(C-V2)
-    # construct Rodrigues rotation matrix
-    # matrix to rotate 120 degrees around vector u
-    W = np.array([[0,-u[2],u[1]],[u[2],0,-u[0]],[-u[1],u[0],0]])
-    R = np.identity(3) + (np.sqrt(3)/2)*W + 1.5 * np.dot(W,W)
-    # remaining vertices are vector from C to V1 rotated 120 degrees in either direction
-    V3 = C + bondLength * unit_vector(np.dot(R,V1-C))
-    V4 = C + bondLength * unit_vector(np.dot(np.transpose(R),V1-C))
-
-    # infer positions the other way
-    V1 = P2
-    V2 = P1
-    # vector from V2 to C
-    u = unit_vector(C-V2)
-    # construct Rodrigues rotation matrix
-    # matrix to rotate 120 degrees around vector u
-    W = np.array([[0,-u[2],u[1]],[u[2],0,-u[0]],[-u[1],u[0],0]])
-    R = np.identity(3) + (np.sqrt(3)/2)*W + 1.5 * np.dot(W,W)
-    # remaining vertices are vector from C to V1 rotated 120 degrees in either direction
-    VV4 = C + bondLength * unit_vector(np.dot(R,V1-C))
-    VV3 = C + bondLength * unit_vector(np.dot(np.transpose(R),V1-C))
+    # infer positions the other way, swapping the roles of P1 and P2
+    VV4, VV3 = rotate_120([c - p for c, p in zip(C, P1)],
+                          [p - c for c, p in zip(C, P2)])
+    VV4, VV3 = vertex(VV4), vertex(VV3)
 
     # average the two inferred positions
-    P3 = (V3+VV3)/2
-    P4 = (V4+VV4)/2
-
-    # diagnostics if desired
-    if 1 > 10:
-        print("pyramidal_hydrogens V3, VV3 distance",np.linalg.norm(V3-VV3))
-        print("pyramidal_hydrogens V4, VV4 distance",np.linalg.norm(V4-VV4))
-        print("pyramidal_hydrogens P1-C-P2 angle",angle_between_three_points(P1,C,P2),"as input")
-        print("pyramidal_hydrogens P1-C-P3 angle",angle_between_three_points(P1,C,P3),"as inferred")
-        print("pyramidal_hydrogens P1-C-P4 angle",angle_between_three_points(P1,C,P4),"as inferred")
-        print("pyramidal_hydrogens P2-C-P3 angle",angle_between_three_points(P2,C,P3),"as inferred")
-        print("pyramidal_hydrogens P2-C-P4 angle",angle_between_three_points(P2,C,P4),"as inferred")
-        print("pyramidal_hydrogens P3-C-P4 angle",angle_between_three_points(P3,C,P4),"as inferred")
+    P3 = np.array([(a + b) / 2 for a, b in zip(V3, VV3)])
+    P4 = np.array([(a + b) / 2 for a, b in zip(V4, VV4)])
     return P3, P4
 
 def planar_hydrogens(P1,P2,P3,bondLength=1):
+    P1 = np.ravel(P1).tolist()
+    P2 = np.ravel(P2).tolist()
+    P3 = np.ravel(P3).tolist()
 
-    A = unit_vector(P2 - P1)
-    A1 = P3 + A*bondLength
-    B = unit_vector(P3 - P2)
+    A = scalar_unit_vector(*[b - a for a, b in zip(P1, P2)])
+    A1 = np.array([p + a * bondLength for p, a in zip(P3, A)])
+    B = scalar_unit_vector(*[b - a for a, b in zip(P2, P3)])
     # Added unit_vector for A->B
-    A2 = P3 + unit_vector(B - A)*bondLength
-
-    # diagnostics if desired
-    if 1 > 10:
-        print("planar_hydrogens P1-P2-P3 angle",angle_between_three_points(P1,P2,P3),"as input")
-        print("planar_hydrogens P2-P3-A1 angle",angle_between_three_points(P2,P3,A1),"as inferred")
-        print("planar_hydrogens P2-P3-A2 angle",angle_between_three_points(P2,P3,A2),"as inferred")
+    AB = scalar_unit_vector(*[b - a for a, b in zip(A, B)])
+    A2 = np.array([p + u * bondLength for p, u in zip(P3, AB)])
     return A1, A2
 
 def planar_ring_hydrogen(P1,P2,P3,bondlength=1):
+    P1 = np.ravel(P1).tolist()
+    P2 = np.ravel(P2).tolist()
+    P3 = np.ravel(P3).tolist()
 
     # vectors P1->P2 and P3->P2
-    u=unit_vector(P2-P1)
-    v=unit_vector(P2-P3)
+    u = scalar_unit_vector(*[b - a for a, b in zip(P1, P2)])
+    v = scalar_unit_vector(*[b - a for a, b in zip(P3, P2)])
 
     # adding the hydrogens
-    w = unit_vector(u + v)
-    A1= P2 + bondlength * w
+    w = scalar_unit_vector(*[a + b for a, b in zip(u, v)])
+    A1 = np.array([p + bondlength * c for p, c in zip(P2, w)])
 
     return A1
 
+# The functions below do the same as the ones above, but on (K, 3) arrays of
+# points, placing the hydrogens of K residues with one call.
+def unit_vectors(v):
+    return v / np.linalg.norm(v, axis=-1)[..., np.newaxis]
+
+def rotate_120_batched(axis, v):
+    u = unit_vectors(axis)
+    d = np.einsum('...i,...i->...', u, v)[..., np.newaxis]
+    cross = SIN_120 * np.cross(u, v)
+    base = v + 1.5 * (u * d - v)
+    return base + cross, base - cross
+
+def pyramidal_hydrogens_batched(P1,C,P2,bondLength=1):
+    V3, V4 = rotate_120_batched(C-P2, P1-C)
+    VV4, VV3 = rotate_120_batched(C-P1, P2-C)
+    P3 = C + bondLength * (unit_vectors(V3) + unit_vectors(VV3)) / 2
+    P4 = C + bondLength * (unit_vectors(V4) + unit_vectors(VV4)) / 2
+    return P3, P4
+
+def planar_hydrogens_batched(P1,P2,P3,bondLength=1):
+    A = unit_vectors(P2 - P1)
+    B = unit_vectors(P3 - P2)
+    return P3 + A*bondLength, P3 + unit_vectors(B - A)*bondLength
+
+def planar_ring_hydrogen_batched(P1,P2,P3,bondlength=1):
+    w = unit_vectors(unit_vectors(P2-P1) + unit_vectors(P2-P3))
+    return P2 + bondlength * w
+
+"""The batched version of each function used in AMINO_ACID_HYDROGENS."""
+BATCHED_HYDROGENS = {
+    pyramidal_hydrogens: pyramidal_hydrogens_batched,
+    planar_hydrogens: planar_hydrogens_batched,
+    planar_ring_hydrogen: planar_ring_hydrogen_batched,
+}
+
+
+"""The steps that place the hydrogens of each amino acid, in order. Each step
+calls one of the functions above on the positions of three named atoms, with
+the bond length if one is given. The returned positions become hydrogens with
+the given names, in the same order, and None skips a position. A step may use
+a hydrogen placed by an earlier step."""
+AMINO_ACID_HYDROGENS = {
+    'ALA': (
+        (pyramidal_hydrogens, ('C', 'CA', 'CB'), None, (None, 'HA')),
+        (planar_hydrogens, ('C', 'CA', 'CB'), NHBondLength, ('HB1', None)),
+        (pyramidal_hydrogens, ('CA', 'CB', 'HB1'), None, ('HB3', 'HB2')),
+    ),
+    'ARG': (
+        (planar_hydrogens, ('NE', 'CZ', 'NH1'), NHBondLength, ('HH11', 'HH12')),
+        (planar_hydrogens, ('NE', 'CZ', 'NH2'), None, ('HH22', 'HH21')),
+        (planar_hydrogens, ('NH1', 'CZ', 'NE'), None, ('HE', None)),
+        (pyramidal_hydrogens, ('CG', 'CD', 'NE'), None, ('HD3', 'HD2')),
+        (pyramidal_hydrogens, ('CB', 'CG', 'CD'), None, ('HG2', 'HG3')),
+        (pyramidal_hydrogens, ('CA', 'CB', 'CG'), None, ('HB2', 'HB3')),
+        (pyramidal_hydrogens, ('C', 'CA', 'CB'), None, (None, 'HA')),
+    ),
+    'ASN': (
+        (pyramidal_hydrogens, ('C', 'CA', 'CB'), None, (None, 'HA')),
+        (pyramidal_hydrogens, ('CA', 'CB', 'CG'), None, ('HB3', 'HB2')),
+        (planar_hydrogens, ('CB', 'CG', 'ND2'), NHBondLength, ('HD22', None)),
+        (planar_hydrogens, ('OD1', 'CG', 'ND2'), NHBondLength, ('HD21', None)),
+    ),
+    'ASP': (
+        (pyramidal_hydrogens, ('C', 'CA', 'CB'), None, (None, 'HA')),
+        (pyramidal_hydrogens, ('CA', 'CB', 'CG'), None, ('HB3', 'HB2')),
+        (planar_hydrogens, ('CB', 'CG', 'OD2'), NHBondLength, ('HD2', None)),
+    ),
+    'CYS': (
+        (pyramidal_hydrogens, ('C', 'CA', 'CB'), None, (None, 'HA')),
+        (pyramidal_hydrogens, ('CA', 'CB', 'SG'), None, ('HB3', 'HB2')),
+        (planar_hydrogens, ('CA', 'CB', 'SG'), NHBondLength, ('HG', None)),
+    ),
+    'GLU': (
+        (pyramidal_hydrogens, ('C', 'CA', 'CB'), None, (None, 'HA')),
+        (pyramidal_hydrogens, ('CA', 'CB', 'CG'), None, ('HB3', 'HB2')),
+        (pyramidal_hydrogens, ('CB', 'CG', 'CD'), None, ('HG3', 'HG2')),
+    ),
+    'GLY': (
+        (pyramidal_hydrogens, ('N', 'CA', 'C'), None, ('HA3', 'HA2')),
+    ),
+    'HIS': (
+        (pyramidal_hydrogens, ('C', 'CA', 'CB'), None, (None, 'HA')),
+        (pyramidal_hydrogens, ('CA', 'CB', 'CG'), None, ('HB3', 'HB2')),
+        (planar_ring_hydrogen, ('CG', 'ND1', 'CE1'), NHBondLength, ('HD1',)),
+        (planar_ring_hydrogen, ('NE2', 'CE1', 'ND1'), NHBondLength, ('HE1',)),
+        (planar_ring_hydrogen, ('CE1', 'NE2', 'CD2'), NHBondLength, ('HE2',)),
+        (planar_ring_hydrogen, ('NE2', 'CD2', 'CG'), NHBondLength, ('HD2',)),
+    ),
+    'ILE': (
+        (pyramidal_hydrogens, ('C', 'CA', 'CB'), None, (None, 'HA')),
+        (pyramidal_hydrogens, ('CB', 'CG1', 'CD1'), None, ('HG12', 'HG13')),
+        (planar_hydrogens, ('CG1', 'CB', 'CG2'), NHBondLength, ('HG23', None)),
+        (pyramidal_hydrogens, ('CB', 'CG2', 'HG23'), None, ('HG22', 'HG21')),
+        (planar_hydrogens, ('CB', 'CG1', 'CD1'), NHBondLength, ('HD11', None)),
+        (pyramidal_hydrogens, ('CG1', 'CD1', 'HD11'), None, ('HD12', 'HD13')),
+    ),
+    'LEU': (
+        (pyramidal_hydrogens, ('C', 'CA', 'CB'), None, (None, 'HA')),
+        (pyramidal_hydrogens, ('CA', 'CB', 'CG'), None, ('HB2', 'HB3')),
+        (planar_hydrogens, ('CA', 'N', 'CG'), None, ('HG', None)),
+        (planar_hydrogens, ('CB', 'HB3', 'CD1'), None, ('HD12', None)),
+        (pyramidal_hydrogens, ('CG', 'CD1', 'HD12'), None, ('HD11', 'HD13')),
+        (planar_hydrogens, ('CB', 'HB2', 'CD2'), None, ('HD21', None)),
+        (pyramidal_hydrogens, ('CG', 'CD2', 'HD21'), None, ('HD22', 'HD23')),
+    ),
+    'LYS': (
+        (pyramidal_hydrogens, ('CG', 'CD', 'CE'), None, ('HD3', 'HD2')),
+        (pyramidal_hydrogens, ('CB', 'CG', 'CD'), None, ('HG3', 'HG2')),
+        (pyramidal_hydrogens, ('CD', 'CE', 'NZ'), None, ('HE3', 'HE2')),
+        (pyramidal_hydrogens, ('CA', 'CB', 'CG'), None, ('HB3', 'HB2')),
+        (pyramidal_hydrogens, ('C', 'CA', 'CB'), None, (None, 'HA')),
+        (planar_hydrogens, ('CD', 'CE', 'NZ'), NHBondLength, ('HZ3', None)),
+        (pyramidal_hydrogens, ('CE', 'NZ', 'HZ3'), None, ('HZ2', 'HZ1')),
+    ),
+    'MET': (
+        (pyramidal_hydrogens, ('C', 'CA', 'CB'), None, (None, 'HA')),
+        (pyramidal_hydrogens, ('CA', 'CB', 'CG'), None, ('HB3', 'HB2')),
+        (pyramidal_hydrogens, ('CB', 'CG', 'SD'), None, ('HG3', 'HG2')),
+        (planar_hydrogens, ('CG', 'SD', 'CE'), NHBondLength, ('HE1', None)),
+        (pyramidal_hydrogens, ('SD', 'CE', 'HE1'), None, ('HE3', 'HE2')),
+    ),
+    'PHE': (
+        (pyramidal_hydrogens, ('C', 'CA', 'CB'), None, (None, 'HA')),
+        (pyramidal_hydrogens, ('CA', 'CB', 'CG'), None, ('HB3', 'HB2')),
+        (planar_ring_hydrogen, ('CG', 'CD1', 'CE1'), NHBondLength, ('HD1',)),
+        (planar_ring_hydrogen, ('CD1', 'CE1', 'CZ'), NHBondLength, ('HE1',)),
+        (planar_ring_hydrogen, ('CE1', 'CZ', 'CE2'), NHBondLength, ('HZ',)),
+        (planar_ring_hydrogen, ('CZ', 'CE2', 'CD2'), NHBondLength, ('HE2',)),
+        (planar_ring_hydrogen, ('CG', 'CD2', 'CE2'), NHBondLength, ('HD2',)),
+    ),
+    'PRO': (
+        (pyramidal_hydrogens, ('C', 'CA', 'CB'), None, (None, 'HA')),
+        (pyramidal_hydrogens, ('CA', 'N', 'CD'), None, ('H', None)),
+        (pyramidal_hydrogens, ('N', 'CD', 'CG'), None, ('HD2', 'HD3')),
+        (pyramidal_hydrogens, ('CD', 'CG', 'CB'), None, ('HG2', 'HG3')),
+        (pyramidal_hydrogens, ('CA', 'CB', 'CG'), None, ('HB3', 'HB2')),
+    ),
+    'SER': (
+        (pyramidal_hydrogens, ('C', 'CA', 'CB'), None, (None, 'HA')),
+        (pyramidal_hydrogens, ('CA', 'CB', 'OG'), None, ('HB3', 'HB2')),
+        (planar_hydrogens, ('CA', 'CB', 'OG'), NHBondLength, ('HG', None)),
+    ),
+    'THR': (
+        (pyramidal_hydrogens, ('C', 'CA', 'CB'), None, (None, 'HA')),
+        (pyramidal_hydrogens, ('CA', 'CB', 'CG2'), None, ('HB', None)),
+        (planar_hydrogens, ('CA', 'CB', 'CG2'), None, ('HG21', None)),
+        (pyramidal_hydrogens, ('CB', 'CG2', 'HG21'), None, ('HG23', 'HG22')),
+        (planar_hydrogens, ('CG2', 'HG23', 'OG1'), None, ('HG1', None)),
+    ),
+    'TRP': (
+        (pyramidal_hydrogens, ('C', 'CA', 'CB'), None, (None, 'HA')),
+        (pyramidal_hydrogens, ('CA', 'CB', 'CG'), None, ('HB3', 'HB2')),
+        (planar_ring_hydrogen, ('CG', 'CD1', 'NE1'), NHBondLength, ('HD1',)),
+        (planar_ring_hydrogen, ('CD1', 'NE1', 'CE2'), NHBondLength, ('HE1',)),
+        (planar_ring_hydrogen, ('CE2', 'CZ2', 'CH2'), NHBondLength, ('HZ2',)),
+        (planar_ring_hydrogen, ('CZ2', 'CH2', 'CZ3'), NHBondLength, ('HH2',)),
+        (planar_ring_hydrogen, ('CH2', 'CZ3', 'CE3'), NHBondLength, ('HZ3',)),
+        (planar_ring_hydrogen, ('CZ3', 'CE3', 'CD2'), NHBondLength, ('HE3',)),
+    ),
+    'TYR': (
+        (pyramidal_hydrogens, ('C', 'CA', 'CB'), None, (None, 'HA')),
+        (pyramidal_hydrogens, ('CA', 'CB', 'CG'), None, ('HB3', 'HB2')),
+        (planar_ring_hydrogen, ('CG', 'CD2', 'CE2'), NHBondLength, ('HD2',)),
+        (planar_ring_hydrogen, ('CD2', 'CE2', 'CZ'), NHBondLength, ('HE2',)),
+        (planar_ring_hydrogen, ('CZ', 'CE1', 'CD1'), NHBondLength, ('HE1',)),
+        (planar_ring_hydrogen, ('CG', 'CD1', 'CE1'), NHBondLength, ('HD1',)),
+    ),
+    'VAL': (
+        (pyramidal_hydrogens, ('C', 'CA', 'CB'), None, (None, 'HA')),
+        (pyramidal_hydrogens, ('CA', 'CB', 'CG1'), None, (None, 'HB')),
+        (planar_hydrogens, ('CA', 'CB', 'CG1'), NHBondLength, ('HG11', None)),
+        (pyramidal_hydrogens, ('CB', 'CG1', 'HG11'), None, ('HG12', 'HG13')),
+        (planar_hydrogens, ('CA', 'CB', 'CG2'), NHBondLength, ('HG23', None)),
+        (pyramidal_hydrogens, ('CB', 'CG2', 'HG23'), None, ('HG21', 'HG22')),
+    ),
+}
+
+def hydrogen_step_atoms(steps):
+    """Find the atoms a list of steps from AMINO_ACID_HYDROGENS works with.
+
+    :steps: The steps for one amino acid.
+    :returns: A pair of sets, the names of the atoms the steps need and the
+    names of the hydrogens they place.
+    """
+
+    hydrogens = frozenset(name for _, _, _, names in steps
+                          for name in names if name is not None)
+    used = frozenset(name for _, names, _, _ in steps for name in names)
+    return used - hydrogens, hydrogens
+
+"""The atoms needed and the hydrogens placed for each amino acid."""
+AMINO_ACID_ATOMS = dict((sequence, hydrogen_step_atoms(steps))
+                        for sequence, steps in AMINO_ACID_HYDROGENS.items())
+
+
+def infer_amino_acid_hydrogens_batched(components):
+    """Infer the hydrogens of many amino acids at once. The amino acids of
+    each kind are stacked, so each step of AMINO_ACID_HYDROGENS places the
+    hydrogens of all of them with a single batched call. Components which
+    are missing atoms, or already have some of the hydrogens, are given to
+    Component.infer_amino_acid_hydrogens one at a time, as are all
+    components which are not amino acids.
+
+    :components: The components to add hydrogens to.
+    """
+
+    stacks = {}
+    for component in components:
+        steps = AMINO_ACID_HYDROGENS.get(component.sequence)
+        if steps is not None:
+            heavy, hydrogens = AMINO_ACID_ATOMS[component.sequence]
+            present = set(component._atom_names)
+            if heavy <= present and present.isdisjoint(hydrogens):
+                stacks.setdefault(component.sequence, []).append(component)
+                continue
+        component.infer_amino_acid_hydrogens()
+
+    for sequence, stack in stacks.items():
+        heavy = sorted(AMINO_ACID_ATOMS[sequence][0])
+        coordinates = np.array([c.centers.bulk(heavy) for c in stack])
+        points = dict(zip(heavy, coordinates.transpose(1, 0, 2)))
+
+        placed = []
+        for place, names, bond, hydrogens in AMINO_ACID_HYDROGENS[sequence]:
+            arguments = [points[name] for name in names]
+            if bond is not None:
+                arguments.append(bond)
+
+            positions = BATCHED_HYDROGENS[place](*arguments)
+            if len(hydrogens) == 1:
+                positions = [positions]
+
+            for name, position in zip(hydrogens, positions):
+                if name is not None:
+                    points[name] = position
+                    placed.append(name)
+
+        for index, component in enumerate(stack):
+            component._atoms.extend(
+                Atom(name=name, coordinates=points[name][index].copy())
+                for name in placed)
+            component.__share_coordinates__()
+
+
+"""The names of amino acid atoms which can form hydrogen bonds."""
+HB_ATOMS = frozenset(['N', 'NH1', 'NH2', 'NE', 'NZ', 'ND1', 'NE2', 'O', 'OD1',
+                      'OE1', 'OE2', 'OG', 'OH'])
 
 
 class Component(EntitySelector):
@@ -111,12 +432,17 @@ class Component(EntitySelector):
 
     def __init__(self, atoms, pdb=None, model=None, type=None, chain=None,
                  symmetry=None, sequence=None, number=None, index=None,
-                 insertion_code=None, polymeric=None, alt_id=None):
+                 insertion_code=None, polymeric=None, alt_id=None,
+                 rotation_matrix=None, base_center=None, inferhydrogens=True):
         """Create a new Component.
 
         :atoms: The atoms this component is composed of.
         :pdb: The pdb this is a part of.
         :model: The model number.
+        :rotation_matrix: A rotation matrix already computed for these atoms,
+        if given it is used instead of calculating one.
+        :base_center: The base center that goes with rotation_matrix.
+        :inferhydrogens: If False the hydrogens of bases are not added.
         """
 
         self._atoms = atoms
@@ -131,25 +457,33 @@ class Component(EntitySelector):
         self.insertion_code = insertion_code
         self.polymeric = polymeric
         self.alt_id = alt_id
-        self.base_center = None
-        self.rotation_matrix = None
+        self.base_center = base_center
+        self.rotation_matrix = rotation_matrix
+        self._standard_transformation = None
+        self._unit_id = None
+        self._coordinates = None
+        self._shared_atoms = None
 
         # for bases, calculate and store rotation_matrix
         # calculate and store base_center; especially for modified nt without all heavy atoms
-        self.calculate_rotation_matrix()
+        if self.rotation_matrix is None:
+            self.calculate_rotation_matrix()
 
-        # initialize centers so they can be used to infer hydrogens
+        # initialize centers so they can be used to infer hydrogens, the
+        # proxy shares self._atoms so it also sees the hydrogens added below
         self.centers = AtomProxy(self._atoms)
 
+        # keep the coordinates of all atoms in one array, adding hydrogens
+        # below updates it
+        self.__share_coordinates__()
+
         # add hydrogen atoms to standard bases and amino acids
-        self.infer_NA_hydrogens()
+        if inferhydrogens:
+            self.infer_NA_hydrogens()
 
         # do not routinely add hydrogen atoms to amino acids
         # self.infer_amino_acid_hydrogens()
 
-        # initialize centers again to include hydrogens
-        self.centers = AtomProxy(self._atoms)
-
         # standard and modified bases should have their rotation matrix
         # calculated already, and should have a base center set by that
         # if they don't, there is no sensible way to assign a base center,
@@ -189,19 +523,11 @@ class Component(EntitySelector):
         """
 
         name = kwargs.get('name')
-        
-        if sys.version_info[0] < 3:
-            if isinstance(name, basestring):
-                definition = self.centers.definition(name)
-                if definition:
-                    kwargs['name'] = definition
-        else:
-            if isinstance(name, str):
-                definition = self.centers.definition(name)
-                if definition:
-                    kwargs['name'] = definition
-            
-            
+        if isinstance(name, str):
+            definition = self.centers.definition(name)
+            if definition:
+                kwargs['name'] = definition
+
         return EntitySelector(self._atoms, **kwargs)
 
     def coordinates(self, **kwargs):
@@ -212,10 +538,31 @@ class Component(EntitySelector):
         :kwargs: Arguments to filter and sort by.
         :returns: A numpy array of the coordinates.
         """
+        # the shared array can only be used while it holds the current atoms
+        shared = self._shared_atoms is not None and \
+            self._atoms == self._shared_atoms
+        if not kwargs and shared:
+            return np.array(self._coordinates)
+
+        # Selecting only by name is the common case, it can index the shared
+        # coordinate array directly instead of going through every Atom.
+        names = kwargs.get('name')
+        if shared and len(kwargs) == 1 and \
+                isinstance(names, (str, list, set, tuple)):
+            if isinstance(names, str):
+                names = self.centers.definition(names) or [names]
+            names = set(names)
+            index = [i for i, n in enumerate(self._atom_names) if n in names]
+            if not index:
+                return np.array([])
+            return self._coordinates[index]
+
         return np.array([atom.coordinates() for atom in self.atoms(**kwargs)])
 
     def select(self, **kwargs):
-        """Select a group of atoms to create a new component out of.
+        """Select a group of atoms to create a new component out of. The new
+        component keeps the rotation matrix and base center of this one, and
+        its hydrogens are only those selected from this one.
 
         :kwargs: As for atoms.
         :returns: A new Component
@@ -232,6 +579,8 @@ class Component(EntitySelector):
                          insertion_code=self.insertion_code,
                          alt_id=self.alt_id,
                          polymeric=self.polymeric,
+                         rotation_matrix=self.rotation_matrix,
+                         base_center=self.base_center,
                          inferhydrogens=False)
 
     def is_complete(self, names, key='name'):
@@ -259,40 +608,39 @@ class Component(EntitySelector):
                 self.sequence not in defs.modified_nucleotides:
             return None
 
-        R = []   # 3d coordinates of observed base
-        S = []   # 3d coordinates of standard base in xy plane
+        atoms = []      # observed base atoms
+        standard = []   # 3d coordinates of standard base in xy plane
 
         if self.sequence in defs.NAbaseheavyatoms:
             baseheavy = defs.NAbaseheavyatoms[self.sequence]
-            for atom in self.atoms(name=baseheavy):
-                R.append(atom.coordinates())
-                S.append(defs.NAbasecoordinates[self.sequence][atom.name])
+            found = list(self.atoms(name=baseheavy))
+            rows, coordinates = NA_BASE_COORDINATES[self.sequence]
+            atoms.extend(found)
+            standard.append(coordinates[[rows[atom.name] for atom in found]])
 
         if self.sequence in defs.modified_nucleotides:
             current = defs.modified_nucleotides[self.sequence]
-            standard_coords = defs.NAbasecoordinates[current["standard"]]
-            for atom in self.atoms(name=current["atoms"].keys()):
-                R.append(atom.coordinates())
-                S.append(standard_coords[atom.name])
-
-        R = np.array(R)
-        R = R.astype(np.float)
-        S = np.array(S)
-        S = S.astype(np.float)
+            found = list(self.atoms(name=current["atoms"].keys()))
+            rows, coordinates = NA_BASE_COORDINATES[current["standard"]]
+            atoms.extend(found)
+            standard.append(coordinates[[rows[atom.name] for atom in found]])
+
+        R = np.array([atom.coordinates() for atom in atoms], dtype=np.float64)
+        S = np.concatenate(standard)
+
+        # atoms and standard are built together, so R and S always match in
+        # length, but there must be something to superimpose
+        if not len(R):
+            print("%s Rotation matrix calculation failed, %d new atoms" % (self.unit_id(),len(R)))
+            return None
 
+        # only the rotation is needed, so skip moving R and computing the RMSD
+        meanR = np.mean(R, axis=0)
+        meanS = np.mean(S, axis=0)
         try:
-            rotation_matrix, fitted, meanR, rmsd, sse, meanS = \
-                besttransformation(R, S)
-        except:
-            if len(R) != len(S):
-                print("%s Rotation matrix calculation failed, sizes %d and %d" % (self.unit_id(),len(R),len(S)))
-            elif len(R) < 3:
-                print("%s Rotation matrix calculation failed, %d new atoms" % (self.unit_id(),len(R)))
-            elif len(S) < 3:
-                print("%s Rotation matrix calculation failed, %d standard atoms" % (self.unit_id(),len(S)))
-            else:
-                print("%s Rotation matrix calculation failed, not sure why" % self.unit_id())
-
+            rotation_matrix = best_rotation_only(R - meanR, S - meanS)
+        except np.linalg.LinAlgError:
+            print("%s Rotation matrix calculation failed, not sure why" % self.unit_id())
             return None
 
         self.rotation_matrix = rotation_matrix
@@ -303,17 +651,7 @@ class Component(EntitySelector):
             self.base_center = meanR
         else:
             # some modified bases are missing some heavy atoms, meanS not zero
-            # this comes out as a numpy matrix?  different than meanR above
-            base_center = np.subtract(meanR,np.dot(rotation_matrix,meanS))
-            self.base_center = np.array([base_center[0,0],base_center[0,1],base_center[0,2]])
-
-        """ For the life of me, I could not figure out any other way of
-        converting base_center from a 2d array to a 1d array.
-        Taking a slice did not work, reshape did not work, etc.
-        This is crucially important; a 2d array won't be written to the
-        unit_centers table in the database.
-        """
-
+            self.base_center = meanR - apply_3x3(rotation_matrix, meanS)
 
     def infer_NA_hydrogens(self):
         """
@@ -323,23 +661,21 @@ class Component(EntitySelector):
         does not have the full unit ID of the atom, unlike the heavy atoms
         taken from the CIF file.
         """
-        try:
-            if self.sequence in defs.NAbasehydrogens:
-                hydrogens = defs.NAbasehydrogens[self.sequence]
-                coordinates = defs.NAbasecoordinates[self.sequence]
-
-                for hydrogenatom in hydrogens:
-                    hydrogencoordinates = coordinates[hydrogenatom]
-                    newcoordinates = self.base_center + \
-                        np.dot(self.rotation_matrix, hydrogencoordinates)
-                    self._atoms.append(Atom(name=hydrogenatom,
-                                            x=newcoordinates[0, 0],
-                                            y=newcoordinates[0, 1],
-                                            z=newcoordinates[0, 2]))
+        if self.sequence not in NA_HYDROGENS:
+            return None
 
-        except:
-                print("%s Adding hydrogens failed" % self.unit_id())
+        # without a rotation matrix, there is no frame to place hydrogens in
+        if self.rotation_matrix is None or self.base_center is None:
+            print("%s Adding hydrogens failed" % self.unit_id())
+            return None
 
+        names, coordinates = NA_HYDROGENS[self.sequence]
+        rotation = np.asarray(self.rotation_matrix)
+        center = np.asarray(self.base_center).ravel()
+        hydrogens = center + np.dot(coordinates, rotation.T)
+        self._atoms.extend(Atom(name=name, coordinates=position.copy())
+                           for name, position in zip(names, hydrogens))
+        self.__share_coordinates__()
 
     def infer_amino_acid_hydrogens(self):
         """
@@ -349,375 +685,64 @@ class Component(EntitySelector):
         does not have the full unit ID of the atom, unlike the heavy atoms
         taken from the CIF file.
         """
-        try:
-
-            if self.sequence == "ALA":
-
-                A1,A2 = pyramidal_hydrogens(self.centers["C"],self.centers["CA"],self.centers["CB"])
-                self._atoms.append(Atom(name="HA",x=A2[0],y=A2[1],z=A2[2]))
-
-                A1,A2 = planar_hydrogens(self.centers["C"],self.centers["CA"],self.centers["CB"],NHBondLength)
-                self._atoms.append(Atom(name="HB1",x=A1[0],y=A1[1],z=A1[2]))
-
-                A1,A2 = pyramidal_hydrogens(self.centers["CA"],self.centers["CB"],self.centers["HB1"])
-                self._atoms.append(Atom(name="HB3",x=A1[0],y=A1[1],z=A1[2]))
-                self._atoms.append(Atom(name="HB2",x=A2[0],y=A2[1],z=A2[2]))
-
-            elif self.sequence == "ARG":
-
-                A1,A2 = planar_hydrogens(self.centers["NE"],self.centers["CZ"],self.centers["NH1"],NHBondLength)
-                self._atoms.append(Atom(name="HH11",x=A1[0],y=A1[1],z=A1[2]))
-                self._atoms.append(Atom(name="HH12",x=A2[0],y=A2[1],z=A2[2]))
-
-                A1,A2 = planar_hydrogens(self.centers["NE"],self.centers["CZ"],self.centers["NH2"])
-                self._atoms.append(Atom(name="HH22",x=A1[0],y=A1[1],z=A1[2]))
-                self._atoms.append(Atom(name="HH21",x=A2[0],y=A2[1],z=A2[2]))
-
-                # the following lines assume that NH2 is closer to CD
-                # than NH1 is however, some structures aren't labeled
-                # that way, and so either A1 or A2 could be the correct
-                # location for HE
-                A1,A2 = planar_hydrogens(self.centers["NH1"],self.centers["CZ"],self.centers["NE"])
-                self._atoms.append(Atom(name="HE",x=A1[0],y=A1[1],z=A1[2]))
-
-                A1,A2 = pyramidal_hydrogens(self.centers["CG"],self.centers["CD"],self.centers["NE"])
-                self._atoms.append(Atom(name="HD3",x=A1[0],y=A1[1],z=A1[2]))
-                self._atoms.append(Atom(name="HD2",x=A2[0],y=A2[1],z=A2[2]))
-
-                A1,A2 = pyramidal_hydrogens(self.centers["CB"],self.centers["CG"],self.centers["CD"])
-                self._atoms.append(Atom(name="HG2",x=A1[0],y=A1[1],z=A1[2]))
-                self._atoms.append(Atom(name="HG3",x=A2[0],y=A2[1],z=A2[2]))
-
-                A1,A2 = pyramidal_hydrogens(self.centers["CA"],self.centers["CB"],self.centers["CG"])
-                self._atoms.append(Atom(name="HB2",x=A1[0],y=A1[1],z=A1[2]))
-                self._atoms.append(Atom(name="HB3",x=A2[0],y=A2[1],z=A2[2]))
-
-                A1,A2 = pyramidal_hydrogens(self.centers["C"],self.centers["CA"],self.centers["CB"])
-                self._atoms.append(Atom(name="HA",x=A2[0],y=A2[1],z=A2[2]))
-
-            elif self.sequence == "ASN":
-
-                A1,A2 = pyramidal_hydrogens(self.centers["C"],self.centers["CA"],self.centers["CB"])
-                self._atoms.append(Atom(name="HA",x=A2[0],y=A2[1],z=A2[2]))
-
-                A1,A2 = pyramidal_hydrogens(self.centers["CA"],self.centers["CB"],self.centers["CG"])
-                self._atoms.append(Atom(name="HB3",x=A1[0],y=A1[1],z=A1[2]))
-                self._atoms.append(Atom(name="HB2",x=A2[0],y=A2[1],z=A2[2]))
-
-                A1,A2 = planar_hydrogens(self.centers["CB"],self.centers["CG"],self.centers["ND2"],NHBondLength)
-                self._atoms.append(Atom(name="HD22",x=A1[0],y=A1[1],z=A1[2]))
-
-                A1,A2 = planar_hydrogens(self.centers["OD1"],self.centers["CG"],self.centers["ND2"],NHBondLength)
-                self._atoms.append(Atom(name="HD21",x=A1[0],y=A1[1],z=A1[2]))
-
-            elif self.sequence == "ASP":
-
-                A1,A2 = pyramidal_hydrogens(self.centers["C"],self.centers["CA"],self.centers["CB"])
-                self._atoms.append(Atom(name="HA",x=A2[0],y=A2[1],z=A2[2]))
-
-                A1,A2 = pyramidal_hydrogens(self.centers["CA"],self.centers["CB"],self.centers["CG"])
-                self._atoms.append(Atom(name="HB3",x=A1[0],y=A1[1],z=A1[2]))
-                self._atoms.append(Atom(name="HB2",x=A2[0],y=A2[1],z=A2[2]))
-
-                A1,A2 = planar_hydrogens(self.centers["CB"],self.centers["CG"],self.centers["OD2"],NHBondLength)
-                self._atoms.append(Atom(name="HD2",x=A1[0],y=A1[1],z=A1[2]))
-
-            elif self.sequence == "CYS":
-
-                A1,A2 = pyramidal_hydrogens(self.centers["C"],self.centers["CA"],self.centers["CB"])
-                self._atoms.append(Atom(name="HA",x=A2[0],y=A2[1],z=A2[2]))
-
-                A1,A2 = pyramidal_hydrogens(self.centers["CA"],self.centers["CB"],self.centers["SG"])
-                self._atoms.append(Atom(name="HB3",x=A1[0],y=A1[1],z=A1[2]))
-                self._atoms.append(Atom(name="HB2",x=A2[0],y=A2[1],z=A2[2]))
-
-                A1,A2 = planar_hydrogens(self.centers["CA"],self.centers["CB"],self.centers["SG"],NHBondLength)
-                self._atoms.append(Atom(name="HG",x=A1[0],y=A1[1],z=A1[2]))
-
-            elif self.sequence == "GLU":
-
-                A1,A2 = pyramidal_hydrogens(self.centers["C"],self.centers["CA"],self.centers["CB"])
-                self._atoms.append(Atom(name="HA",x=A2[0],y=A2[1],z=A2[2]))
-
-                A1,A2 = pyramidal_hydrogens(self.centers["CA"],self.centers["CB"],self.centers["CG"])
-                self._atoms.append(Atom(name="HB3",x=A1[0],y=A1[1],z=A1[2]))
-                self._atoms.append(Atom(name="HB2",x=A2[0],y=A2[1],z=A2[2]))
-
-                A1,A2 = pyramidal_hydrogens(self.centers["CB"],self.centers["CG"],self.centers["CD"])
-                self._atoms.append(Atom(name="HG3",x=A1[0],y=A1[1],z=A1[2]))
-                self._atoms.append(Atom(name="HG2",x=A2[0],y=A2[1],z=A2[2]))
-
-            elif self.sequence == "GLY":
-
-                A1,A2 = pyramidal_hydrogens(self.centers["N"],self.centers["CA"],self.centers["C"])
-                self._atoms.append(Atom(name="HA3",x=A1[0],y=A1[1],z=A1[2]))
-                self._atoms.append(Atom(name="HA2",x=A2[0],y=A2[1],z=A2[2]))
-
-            elif self.sequence == "HIS":
-
-                A1,A2 = pyramidal_hydrogens(self.centers["C"],self.centers["CA"],self.centers["CB"])
-                self._atoms.append(Atom(name="HA",x=A2[0],y=A2[1],z=A2[2]))
-
-                A1,A2 = pyramidal_hydrogens(self.centers["CA"],self.centers["CB"],self.centers["CG"])
-                self._atoms.append(Atom(name="HB3",x=A1[0],y=A1[1],z=A1[2]))
-                self._atoms.append(Atom(name="HB2",x=A2[0],y=A2[1],z=A2[2]))
-
-                A1 = planar_ring_hydrogen(self.centers["CG"],self.centers["ND1"],self.centers["CE1"],NHBondLength)
-                self._atoms.append(Atom(name="HD1",x=A1[0],y=A1[1],z=A1[2]))
-
-                A1 = planar_ring_hydrogen(self.centers["NE2"],self.centers["CE1"],self.centers["ND1"],NHBondLength)
-                self._atoms.append(Atom(name="HE1",x=A1[0],y=A1[1],z=A1[2]))
-
-                A1 = planar_ring_hydrogen(self.centers["CE1"],self.centers["NE2"],self.centers["CD2"],NHBondLength)
-                self._atoms.append(Atom(name="HE2",x=A1[0],y=A1[1],z=A1[2]))
-
-                A1 = planar_ring_hydrogen(self.centers["NE2"],self.centers["CD2"],self.centers["CG"],NHBondLength)
-                self._atoms.append(Atom(name="HD2",x=A1[0],y=A1[1],z=A1[2]))
-
-            elif self.sequence == "ILE":
-
-                A1,A2 = pyramidal_hydrogens(self.centers["C"],self.centers["CA"],self.centers["CB"])
-                self._atoms.append(Atom(name="HA",x=A2[0],y=A2[1],z=A2[2]))
-
-                A1,A2 = pyramidal_hydrogens(self.centers["CB"],self.centers["CG1"],self.centers["CD1"])
-                self._atoms.append(Atom(name="HG12",x=A1[0],y=A1[1],z=A1[2]))
-                self._atoms.append(Atom(name="HG13",x=A2[0],y=A2[1],z=A2[2]))
-
-                A1,A2 = planar_hydrogens(self.centers["CG1"],self.centers["CB"],self.centers["CG2"],NHBondLength)
-                self._atoms.append(Atom(name="HG23",x=A1[0],y=A1[1],z=A1[2]))
-
-                A1,A2 = pyramidal_hydrogens(self.centers["CB"],self.centers["CG2"],self.centers["HG23"])
-                self._atoms.append(Atom(name="HG22",x=A1[0],y=A1[1],z=A1[2]))
-                self._atoms.append(Atom(name="HG21",x=A2[0],y=A2[1],z=A2[2]))
-
-                A1,A2 = planar_hydrogens(self.centers["CB"],self.centers["CG1"],self.centers["CD1"],NHBondLength)
-                self._atoms.append(Atom(name="HD11",x=A1[0],y=A1[1],z=A1[2]))
-
-                A1,A2 = pyramidal_hydrogens(self.centers["CG1"],self.centers["CD1"],self.centers["HD11"])
-                self._atoms.append(Atom(name="HD12",x=A1[0],y=A1[1],z=A1[2]))
-                self._atoms.append(Atom(name="HD13",x=A2[0],y=A2[1],z=A2[2]))
-
-            elif self.sequence == "LEU":
-
-                A1,A2 = pyramidal_hydrogens(self.centers["C"],self.centers["CA"],self.centers["CB"])
-                self._atoms.append(Atom(name="HA",x=A2[0],y=A2[1],z=A2[2]))
-
-                A1,A2 = pyramidal_hydrogens(self.centers["CA"],self.centers["CB"],self.centers["CG"])
-                self._atoms.append(Atom(name="HB2",x=A1[0],y=A1[1],z=A1[2]))
-                self._atoms.append(Atom(name="HB3",x=A2[0],y=A2[1],z=A2[2]))
-
-                A1,A2 = planar_hydrogens(self.centers["CA"],self.centers["N"],self.centers["CG"])
-                self._atoms.append(Atom(name="HG",x=A1[0],y=A1[1],z=A1[2]))
-
-                A1,A2 = planar_hydrogens(self.centers["CB"],self.centers["HB3"],self.centers["CD1"])
-                self._atoms.append(Atom(name="HD12",x=A1[0],y=A1[1],z=A1[2]))
-
-                A1,A2 = pyramidal_hydrogens(self.centers["CG"],self.centers["CD1"],self.centers["HD12"])
-                self._atoms.append(Atom(name="HD11",x=A1[0],y=A1[1],z=A1[2]))
-                self._atoms.append(Atom(name="HD13",x=A2[0],y=A2[1],z=A2[2]))
-
-                A1,A2 = planar_hydrogens(self.centers["CB"],self.centers["HB2"],self.centers["CD2"])
-                self._atoms.append(Atom(name="HD21",x=A1[0],y=A1[1],z=A1[2]))
-
-                A1,A2 = pyramidal_hydrogens(self.centers["CG"],self.centers["CD2"],self.centers["HD21"])
-                self._atoms.append(Atom(name="HD22",x=A1[0],y=A1[1],z=A1[2]))
-                self._atoms.append(Atom(name="HD23",x=A2[0],y=A2[1],z=A2[2]))
-
-            elif self.sequence == "LYS":
-
-                A1,A2 = pyramidal_hydrogens(self.centers["CG"],self.centers["CD"],self.centers["CE"])
-                self._atoms.append(Atom(name="HD3",x=A1[0],y=A1[1],z=A1[2]))
-                self._atoms.append(Atom(name="HD2",x=A2[0],y=A2[1],z=A2[2]))
-
-                A1,A2 = pyramidal_hydrogens(self.centers["CB"],self.centers["CG"],self.centers["CD"])
-                self._atoms.append(Atom(name="HG3",x=A1[0],y=A1[1],z=A1[2]))
-                self._atoms.append(Atom(name="HG2",x=A2[0],y=A2[1],z=A2[2]))
-
-                A1,A2 = pyramidal_hydrogens(self.centers["CD"],self.centers["CE"],self.centers["NZ"])
-                self._atoms.append(Atom(name="HE3",x=A1[0],y=A1[1],z=A1[2]))
-                self._atoms.append(Atom(name="HE2",x=A2[0],y=A2[1],z=A2[2]))
-
-                A1,A2 = pyramidal_hydrogens(self.centers["CA"],self.centers["CB"],self.centers["CG"])
-                self._atoms.append(Atom(name="HB3",x=A1[0],y=A1[1],z=A1[2]))
-                self._atoms.append(Atom(name="HB2",x=A2[0],y=A2[1],z=A2[2]))
-
-                A1,A2 = pyramidal_hydrogens(self.centers["C"],self.centers["CA"],self.centers["CB"])
-                self._atoms.append(Atom(name="HA",x=A2[0],y=A2[1],z=A2[2]))
-
-                A1,A2 = planar_hydrogens(self.centers["CD"],self.centers["CE"],self.centers["NZ"],NHBondLength)
-                self._atoms.append(Atom(name="HZ3",x=A1[0],y=A1[1],z=A1[2]))
-
-                A1,A2 = pyramidal_hydrogens(self.centers["CE"],self.centers["NZ"],self.centers["HZ3"])
-                self._atoms.append(Atom(name="HZ2",x=A1[0],y=A1[1],z=A1[2]))
-                self._atoms.append(Atom(name="HZ1",x=A2[0],y=A2[1],z=A2[2]))
-
-            elif self.sequence == "MET":
-
-                A1,A2 = pyramidal_hydrogens(self.centers["C"],self.centers["CA"],self.centers["CB"])
-                self._atoms.append(Atom(name="HA",x=A2[0],y=A2[1],z=A2[2]))
-
-                A1,A2 = pyramidal_hydrogens(self.centers["CA"],self.centers["CB"],self.centers["CG"])
-                self._atoms.append(Atom(name="HB3",x=A1[0],y=A1[1],z=A1[2]))
-                self._atoms.append(Atom(name="HB2",x=A2[0],y=A2[1],z=A2[2]))
-
-                A1,A2 = pyramidal_hydrogens(self.centers["CB"],self.centers["CG"],self.centers["SD"])
-                self._atoms.append(Atom(name="HG3",x=A1[0],y=A1[1],z=A1[2]))
-                self._atoms.append(Atom(name="HG2",x=A2[0],y=A2[1],z=A2[2]))
-
-                A1,A2 = planar_hydrogens(self.centers["CG"],self.centers["SD"],self.centers["CE"],NHBondLength)
-                self._atoms.append(Atom(name="HE1",x=A1[0],y=A1[1],z=A1[2]))
-
-                A1,A2 = pyramidal_hydrogens(self.centers["SD"],self.centers["CE"],self.centers["HE1"])
-                self._atoms.append(Atom(name="HE3",x=A1[0],y=A1[1],z=A1[2]))
-                self._atoms.append(Atom(name="HE2",x=A2[0],y=A2[1],z=A2[2]))
-
-            elif self.sequence == "PHE":
-
-                A1,A2 = pyramidal_hydrogens(self.centers["C"],self.centers["CA"],self.centers["CB"])
-                self._atoms.append(Atom(name="HA",x=A2[0],y=A2[1],z=A2[2]))
-
-                A1,A2 = pyramidal_hydrogens(self.centers["CA"],self.centers["CB"],self.centers["CG"])
-                self._atoms.append(Atom(name="HB3",x=A1[0],y=A1[1],z=A1[2]))
-                self._atoms.append(Atom(name="HB2",x=A2[0],y=A2[1],z=A2[2]))
-
-                A1 = planar_ring_hydrogen(self.centers["CG"],self.centers["CD1"],self.centers["CE1"],NHBondLength)
-                self._atoms.append(Atom(name="HD1",x=A1[0],y=A1[1],z=A1[2]))
-
-                A1 = planar_ring_hydrogen(self.centers["CD1"],self.centers["CE1"],self.centers["CZ"],NHBondLength)
-                self._atoms.append(Atom(name="HE1",x=A1[0],y=A1[1],z=A1[2]))
-
-                A1 = planar_ring_hydrogen(self.centers["CE1"],self.centers["CZ"],self.centers["CE2"],NHBondLength)
-                self._atoms.append(Atom(name="HZ",x=A1[0],y=A1[1],z=A1[2]))
-
-                A1 = planar_ring_hydrogen(self.centers["CZ"],self.centers["CE2"],self.centers["CD2"],NHBondLength)
-                self._atoms.append(Atom(name="HE2",x=A1[0],y=A1[1],z=A1[2]))
-
-                A1 = planar_ring_hydrogen(self.centers["CG"],self.centers["CD2"],self.centers["CE2"],NHBondLength)
-                self._atoms.append(Atom(name="HD2",x=A1[0],y=A1[1],z=A1[2]))
-
-            elif self.sequence == "PRO":
-
-                A1,A2 = pyramidal_hydrogens(self.centers["C"],self.centers["CA"],self.centers["CB"])
-                self._atoms.append(Atom(name="HA",x=A2[0],y=A2[1],z=A2[2]))
-
-                A1,A2 = pyramidal_hydrogens(self.centers["CA"],self.centers["N"],self.centers["CD"])
-                self._atoms.append(Atom(name="H",x=A1[0],y=A1[1],z=A1[2]))
-
-                A1,A2 = pyramidal_hydrogens(self.centers["N"],self.centers["CD"],self.centers["CG"])
-                self._atoms.append(Atom(name="HD2",x=A1[0],y=A1[1],z=A1[2]))
-                self._atoms.append(Atom(name="HD3",x=A2[0],y=A2[1],z=A2[2]))
-
-                A1,A2 = pyramidal_hydrogens(self.centers["CD"],self.centers["CG"],self.centers["CB"])
-                self._atoms.append(Atom(name="HG2",x=A1[0],y=A1[1],z=A1[2]))
-                self._atoms.append(Atom(name="HG3",x=A2[0],y=A2[1],z=A2[2]))
-
-                A1,A2 = pyramidal_hydrogens(self.centers["CA"],self.centers["CB"],self.centers["CG"])
-                self._atoms.append(Atom(name="HB3",x=A1[0],y=A1[1],z=A1[2]))
-                self._atoms.append(Atom(name="HB2",x=A2[0],y=A2[1],z=A2[2]))
-
-            elif self.sequence == "SER":
-
-                A1,A2 = pyramidal_hydrogens(self.centers["C"],self.centers["CA"],self.centers["CB"])
-                self._atoms.append(Atom(name="HA",x=A2[0],y=A2[1],z=A2[2]))
-
-                A1,A2 = pyramidal_hydrogens(self.centers["CA"],self.centers["CB"],self.centers["OG"])
-                self._atoms.append(Atom(name="HB3",x=A1[0],y=A1[1],z=A1[2]))
-                self._atoms.append(Atom(name="HB2",x=A2[0],y=A2[1],z=A2[2]))
-
-                A1,A2 = planar_hydrogens(self.centers["CA"],self.centers["CB"],self.centers["OG"],NHBondLength)
-                self._atoms.append(Atom(name="HG",x=A1[0],y=A1[1],z=A1[2]))
-
-            elif self.sequence == "THR":
-
-                A1,A2 = pyramidal_hydrogens(self.centers["C"],self.centers["CA"],self.centers["CB"])
-                self._atoms.append(Atom(name="HA",x=A2[0],y=A2[1],z=A2[2]))
-
-                A1,A2 = pyramidal_hydrogens(self.centers["CA"],self.centers["CB"],self.centers["CG2"])
-                self._atoms.append(Atom(name="HB",x=A1[0],y=A1[1],z=A1[2]))
-
-                A1,A2 = planar_hydrogens(self.centers["CA"],self.centers["CB"],self.centers["CG2"])
-                self._atoms.append(Atom(name="HG21",x=A1[0],y=A1[1],z=A1[2]))
-
-                A1,A2 = pyramidal_hydrogens(self.centers["CB"],self.centers["CG2"],self.centers["HG21"])
-                self._atoms.append(Atom(name="HG23",x=A1[0],y=A1[1],z=A1[2]))
-                self._atoms.append(Atom(name="HG22",x=A2[0],y=A2[1],z=A2[2]))
-
-                A1,A2 = planar_hydrogens(self.centers["CG2"],self.centers["HG23"],self.centers["OG1"])
-                self._atoms.append(Atom(name="HG1",x=A1[0],y=A1[1],z=A1[2]))
-
-            elif self.sequence == "TRP":
-
-                A1,A2 = pyramidal_hydrogens(self.centers["C"],self.centers["CA"],self.centers["CB"])
-                self._atoms.append(Atom(name="HA",x=A2[0],y=A2[1],z=A2[2]))
-
-                A1,A2 = pyramidal_hydrogens(self.centers["CA"],self.centers["CB"],self.centers["CG"])
-                self._atoms.append(Atom(name="HB3",x=A1[0],y=A1[1],z=A1[2]))
-                self._atoms.append(Atom(name="HB2",x=A2[0],y=A2[1],z=A2[2]))
-
-                A1 = planar_ring_hydrogen(self.centers["CG"],self.centers["CD1"],self.centers["NE1"],NHBondLength)
-                self._atoms.append(Atom(name="HD1",x=A1[0],y=A1[1],z=A1[2]))
-
-                A1 = planar_ring_hydrogen(self.centers["CD1"],self.centers["NE1"],self.centers["CE2"],NHBondLength)
-                self._atoms.append(Atom(name="HE1",x=A1[0],y=A1[1],z=A1[2]))
-
-                A1 = planar_ring_hydrogen(self.centers["CE2"],self.centers["CZ2"],self.centers["CH2"],NHBondLength)
-                self._atoms.append(Atom(name="HZ2",x=A1[0],y=A1[1],z=A1[2]))
-
-                A1 = planar_ring_hydrogen(self.centers["CZ2"],self.centers["CH2"],self.centers["CZ3"],NHBondLength)
-                self._atoms.append(Atom(name="HH2",x=A1[0],y=A1[1],z=A1[2]))
-
-                A1 = planar_ring_hydrogen(self.centers["CH2"],self.centers["CZ3"],self.centers["CE3"],NHBondLength)
-                self._atoms.append(Atom(name="HZ3",x=A1[0],y=A1[1],z=A1[2]))
-
-                A1 = planar_ring_hydrogen(self.centers["CZ3"],self.centers["CE3"],self.centers["CD2"],NHBondLength)
-                self._atoms.append(Atom(name="HE3",x=A1[0],y=A1[1],z=A1[2]))
-
-            elif self.sequence == "TYR":
-
-                A1,A2 = pyramidal_hydrogens(self.centers["C"],self.centers["CA"],self.centers["CB"])
-                self._atoms.append(Atom(name="HA",x=A2[0],y=A2[1],z=A2[2]))
-
-                A1,A2 = pyramidal_hydrogens(self.centers["CA"],self.centers["CB"],self.centers["CG"])
-                self._atoms.append(Atom(name="HB3",x=A1[0],y=A1[1],z=A1[2]))
-                self._atoms.append(Atom(name="HB2",x=A2[0],y=A2[1],z=A2[2]))
-
-                A1 = planar_ring_hydrogen(self.centers["CG"],self.centers["CD2"],self.centers["CE2"],NHBondLength)
-                self._atoms.append(Atom(name="HD2",x=A1[0],y=A1[1],z=A1[2]))
-
-                A1 = planar_ring_hydrogen(self.centers["CD2"],self.centers["CE2"],self.centers["CZ"],NHBondLength)
-                self._atoms.append(Atom(name="HE2",x=A1[0],y=A1[1],z=A1[2]))
-
-                A1 = planar_ring_hydrogen(self.centers["CZ"],self.centers["CE1"],self.centers["CD1"],NHBondLength)
-                self._atoms.append(Atom(name="HE1",x=A1[0],y=A1[1],z=A1[2]))
-
-                A1 = planar_ring_hydrogen(self.centers["CG"],self.centers["CD1"],self.centers["CE1"],NHBondLength)
-                self._atoms.append(Atom(name="HD1",x=A1[0],y=A1[1],z=A1[2]))
-
-            elif self.sequence == "VAL":
-
-                A1,A2 = pyramidal_hydrogens(self.centers["C"],self.centers["CA"],self.centers["CB"])
-                self._atoms.append(Atom(name="HA",x=A2[0],y=A2[1],z=A2[2]))
-
-                A1,A2 = pyramidal_hydrogens(self.centers["CA"],self.centers["CB"],self.centers["CG1"])
-                self._atoms.append(Atom(name="HB",x=A2[0],y=A2[1],z=A2[2]))
-
-                A1,A2 = planar_hydrogens(self.centers["CA"],self.centers["CB"],self.centers["CG1"],NHBondLength)
-                self._atoms.append(Atom(name="HG11",x=A1[0],y=A1[1],z=A1[2]))
-
-                A1,A2 = pyramidal_hydrogens(self.centers["CB"],self.centers["CG1"],self.centers["HG11"])
-                self._atoms.append(Atom(name="HG12",x=A1[0],y=A1[1],z=A1[2]))
-                self._atoms.append(Atom(name="HG13",x=A2[0],y=A2[1],z=A2[2]))
-
-                A1,A2 = planar_hydrogens(self.centers["CA"],self.centers["CB"],self.centers["CG2"],NHBondLength)
-                self._atoms.append(Atom(name="HG23",x=A1[0],y=A1[1],z=A1[2]))
-
-                A1,A2 = pyramidal_hydrogens(self.centers["CB"],self.centers["CG2"],self.centers["HG23"])
-                self._atoms.append(Atom(name="HG21",x=A1[0],y=A1[1],z=A1[2]))
-                self._atoms.append(Atom(name="HG22",x=A2[0],y=A2[1],z=A2[2]))
+        # a step is skipped if one of its atoms is missing, which also skips
+        # the later steps that need the hydrogens it would have placed
+        available = set(atom.name for atom in self._atoms)
+        skipped = False
+        for place, names, bond, hydrogens in \
+                AMINO_ACID_HYDROGENS.get(self.sequence, ()):
+            if not available.issuperset(names):
+                skipped = True
+                continue
+
+            points = list(self.centers.bulk(names))
+            if bond is not None:
+                points.append(bond)
+
+            positions = place(*points)
+            if len(hydrogens) == 1:
+                positions = [positions]
+
+            for name, position in zip(hydrogens, positions):
+                if name is not None:
+                    self._atoms.append(Atom(name=name, x=position[0],
+                                            y=position[1], z=position[2]))
+                    available.add(name)
+
+        if skipped:
+            print("%s Adding hydrogens failed" % self.unit_id())
+
+        self.__share_coordinates__()
+
+    def __share_coordinates__(self):
+        """Copy the coordinates of all atoms into a single (N, 3) array owned
+        by this component and have each atom use its row of that array, so
+        the atoms and the component always agree on the coordinates.
+
+        Atoms which already use a row of another array, such as the atoms of
+        the component a new one was selected from, are left alone so that
+        the other component keeps agreeing with them. Then this component
+        does not own its atoms and always reads the atoms themselves.
+        """
 
-        except:
-                print("%s Adding hydrogens failed" % self.unit_id())
+        previous = self._coordinates
+        coordinates = np.array([atom.coordinates() for atom in self._atoms])
+        owned = True
+        for atom, row in zip(self._atoms, coordinates):
+            base = getattr(atom._coordinates, 'base', None)
+            if base is None or base is previous:
+                atom._coordinates = row
+            else:
+                owned = False
 
+        self._coordinates = coordinates
+        self._atom_names = [atom.name for atom in self._atoms]
+        if owned:
+            self._shared_atoms = list(self._atoms)
+            self.centers.setcoordinates(coordinates, self._atom_names)
+        else:
+            self._shared_atoms = None
+            self.centers.setcoordinates(None, None)
 
     def transform(self, transform_matrix):
         """Create a new component from "self" by applying the 4x4 transformation
@@ -729,7 +754,16 @@ class Component(EntitySelector):
         transformed coordinates.
         """
 
-        atoms = [atom.transform(transform_matrix) for atom in self.atoms()]
+        coordinates = np.reshape(self.coordinates(), (-1, 3))
+        if coordinates.dtype == object:
+            # some atom has no coordinates, move the others one at a time
+            atoms = [atom.transform(transform_matrix) for atom in self.atoms()]
+        else:
+            # move all atoms at once using homogeneous coordinates
+            homogeneous = np.ones((len(coordinates), 4))
+            homogeneous[:, 0:3] = coordinates
+            moved = np.dot(homogeneous, np.transpose(transform_matrix))
+            atoms = Atom.from_arrays(moved[:, 0:3], self.atoms())
         comp = Component(atoms, pdb=self.pdb,
                          model=self.model,
                          type=self.type,
@@ -744,17 +778,18 @@ class Component(EntitySelector):
         return comp
 
     def translate_rotate(self, residue):
+        """Translate and rotate the atoms of residue according to the
+        translation and rotation that will bring self to standard position at
+        the origin.
+
+        :param Component residue: The residue to move.
+        :returns: A list of the moved [x, y, z] coordinates, one per atom.
+        """
+
         reference = self.centers["base"]
-        rotation = self.rotation_matrix
-        for atom in residue.atoms():
-            atom_coord = atom.coordinates()
-            dist_translate = np.subtract(atom_coord, reference)
-            dist_aa_matrix = np.matrix(dist_translate)
-            rotated_atom = dist_aa_matrix * rotation
-            coord_array = np.array(rotated_atom)
-            a = coord_array.flatten()
-            transformed_coord = a.tolist()
-        return transformed_coord
+        rotation = np.asarray(self.rotation_matrix)
+        coordinates = np.reshape(residue.coordinates(), (-1, 3))
+        return np.dot(coordinates - reference, rotation).tolist()
 
     def translate_rotate_component(self, component):
         """Translate and rotate the atoms in component according to
@@ -764,7 +799,11 @@ class Component(EntitySelector):
         :returns Component newcomp
         """
 
-        atoms = [self.translate_rotate_atom(atom) for atom in component.atoms()]
+        rotation = np.asarray(self.rotation_matrix)
+        center = np.asarray(self.base_center).ravel()
+        coordinates = np.reshape(component.coordinates(), (-1, 3))
+        moved = np.dot(coordinates - center, rotation)
+        atoms = Atom.from_arrays(moved, component.atoms())
         newcomp = Component(atoms, pdb=component.pdb,
                          model=component.model,
                          type=component.type,
@@ -790,25 +829,9 @@ class Component(EntitySelector):
 
         atom_coord = atom.coordinates()
         translated_coord = np.subtract(atom_coord, self.base_center)
-        translated_coord_matrix = np.matrix(translated_coord)
-        rotated_coord = translated_coord_matrix * self.rotation_matrix
-        coord_array = np.array(rotated_coord)
-        a = coord_array.flatten()
-        x, y, z = a.tolist()
-        return Atom(x=x, y=y, z=z,
-                    pdb=atom.pdb,
-                    model=atom.model,
-                    chain=atom.chain,
-                    component_id=atom.component_id,
-                    component_number=atom.component_number,
-                    component_index=atom.component_index,
-                    insertion_code=atom.insertion_code,
-                    alt_id=atom.alt_id,
-                    group=atom.group,
-                    type=atom.type,
-                    name=atom.name,
-                    symmetry=atom.symmetry,
-                    polymeric=atom.polymeric)
+        # a row vector times the matrix is the transpose times the vector
+        rotation = np.asarray(self.rotation_matrix).T
+        return atom.with_coordinates(apply_3x3(rotation, translated_coord))
 
     def standard_transformation(self):
         """Returns a 4X4 transformation matrix which can be used to transform
@@ -824,47 +847,76 @@ class Component(EntitySelector):
         base_center = self.centers["base"]
         if len(base_center) == 0:
             return None
-        seq = self.sequence
+
+        # the matrix only changes if the rotation or the base center is
+        # replaced, so it is kept, read only, until then
+        rotation = self.rotation_matrix
+        cached = self._standard_transformation
+        if cached is not None and cached[0] is rotation and \
+                cached[1] is base_center:
+            return cached[2]
+
         dist_translate = base_center
 
-        rotation_matrix_transpose = self.rotation_matrix.transpose()
+        rotation_matrix_transpose = rotation.transpose()
 
         matrix = np.zeros((4, 4))
         matrix[0:3, 0:3] = rotation_matrix_transpose
-        matrix[0:3, 3] = -np.dot(rotation_matrix_transpose, dist_translate)
+        matrix[0:3, 3] = -apply_3x3(rotation_matrix_transpose, dist_translate)
         matrix[3, 3] = 1.0
+        matrix.flags.writeable = False
 
+        self._standard_transformation = (rotation, base_center, matrix)
         return matrix
 
     def translate(self, aa_residue):
+        """Translate and rotate coordinates like translate_rotate.
+
+        :aa_residue: The [x, y, z] coordinates to move.
+        :returns: A list of the moved [x, y, z] coordinates, or None if self
+        has no base.
+        """
+
         if 'base' not in self.centers:
             return None
-        rotation = self.rotation_matrix
-        for atom in aa_residue:
-            dist_translate = np.subtract(atom, self.centers["base"])
-            rotated_atom = dist_translate*rotation
-            coord_array = np.array(rotated_atom)
-            a = coord_array.flatten()
-            coord = a.tolist()
-        return coord
+        rotation = np.asarray(self.rotation_matrix)
+        coordinates = np.reshape(np.asarray(aa_residue, dtype=float), (-1, 3))
+        return np.dot(coordinates - self.centers["base"], rotation).tolist()
 
 
+    def __identity__(self):
+        """The fields which identify this Component, in unit id order.
+        """
+
+        return (self.pdb, self.model, self.chain, self.sequence, self.number,
+                self.alt_id, self.insertion_code, self.symmetry)
+
     def unit_id(self):
-        """Compute the unit id of this Component.
+        """Compute the unit id of this Component. The encoded id is cached
+        along with the fields it was built from, so it is only rebuilt if one
+        of them changes.
 
         :returns: The unit id.
         """
 
-        return encode({
-            'pdb': self.pdb,
-            'model': self.model,
-            'chain': self.chain,
-            'component_id': self.sequence,
-            'component_number': self.number,
-            'alt_id': self.alt_id,
-            'insertion_code': self.insertion_code,
-            'symmetry': self.symmetry
+        identity = self.__identity__()
+        if self._unit_id is not None and self._unit_id[0] == identity:
+            return self._unit_id[1]
+
+        pdb, model, chain, sequence, number, alt_id, insertion_code, \
+            symmetry = identity
+        encoded = encode({
+            'pdb': pdb,
+            'model': model,
+            'chain': chain,
+            'component_id': sequence,
+            'component_number': number,
+            'alt_id': alt_id,
+            'insertion_code': insertion_code,
+            'symmetry': symmetry
         })
+        self._unit_id = (identity, encoded)
+        return encoded
 
     def atoms_within(self, other, cutoff, using=None, to=None, min_number=1):
         """Determine if there are any atoms from another component within some
@@ -884,11 +936,13 @@ class Component(EntitySelector):
         if to:
             kw2['name'] = to
 
-        n = 0
-        for atom1 in self.atoms(**kw1):
-            for atom2 in other.atoms(**kw2):
-                if atom1.distance(atom2) <= abs(cutoff):
-                    n = n+1
+        # compare squared distances between all pairs at once, so no square
+        # roots are needed
+        first = np.reshape(self.coordinates(**kw1), (-1, 1, 3))
+        second = np.reshape(other.coordinates(**kw2), (1, -1, 3))
+        differences = first - second
+        squared = np.einsum('ijk,ijk->ij', differences, differences)
+        n = np.count_nonzero(squared <= cutoff * cutoff)
 
         if n >= min_number:
             return True
@@ -906,6 +960,9 @@ class Component(EntitySelector):
         coordinates = self.centers[using]
         other_coord = other.centers[to]
         distance = np.subtract(coordinates, other_coord)
+        # centers are single points, where a dot product is all norm does
+        if distance.shape == (3,):
+            return math.sqrt(np.dot(distance, distance))
         return np.linalg.norm(distance)
 
     def __len__(self):
@@ -917,15 +974,13 @@ class Component(EntitySelector):
         return len(self._atoms)
 
     def __eq__(self, other):
+        if self is other:
+            return True
         return isinstance(other, Component) and \
-            self.pdb == other.pdb and \
-            self.model == other.model and \
-            self.chain == other.chain and \
-            self.symmetry == other.symmetry and \
-            self.sequence == other.sequence and \
-            self.number == other.number and \
-            self.insertion_code == other.insertion_code and \
-            self.alt_id == other.alt_id
+            self.__identity__() == other.__identity__()
+
+    def __hash__(self):
+        return hash(self.__identity__())
 
     def __repr__(self):
         return '<Component %s>' % self.unit_id()
@@ -940,7 +995,7 @@ class Component(EntitySelector):
         P1 = self.centers[defs.planar_atoms[key][0]]
         P2 = self.centers[defs.planar_atoms[key][1]]
         P3 = self.centers[defs.planar_atoms[key][2]]
-        vector = np.cross((P2 - P1), (P3-P1))
+        vector = cross_product((P2 - P1), (P3-P1))
         return vector
 
     def enough_hydrogen_bonds(self, second, min_distance=4, min_bonds=2):
@@ -949,29 +1004,24 @@ class Component(EntitySelector):
         of aa/nt if two or more atoms are within the cutoff distance.
         """
 
-        HB_atoms = set(['N', 'NH1','NH2','NE','NZ','ND1','NE2','O','OD1','OE1','OE2', 'OG', 'OH'])
-        n = 0
-        base_seq = self.sequence()
-        for base_atom in self.atoms(name=defs.NAbaseheavyatoms[base_seq]):
-            for aa_atom in second.atoms(name=defs.aa_fg[second.sequence]):
-                distance = np.subtract(base_atom.coordinates(), aa_atom.coordinates())
-                distance = np.linalg.norm(distance)
-                if distance <= min_distance and aa_atom.name in HB_atoms:
-                    n = n + 1
-                    if n > min_bonds:
-                        return True
-        return False
-
-    def stacking_tilt(aa_residue, aa_coordinates):
-        baa_dist_list = []
-
-        for aa_atom in aa_residue.atoms(name=defs.aa_fg[aa_residue.sequence]):
-            key = aa_atom.name
-            aa_z = aa_coordinates[key][2]
-            baa_dist_list.append(aa_z)
-        max_baa = max(baa_dist_list)
-        min_baa = min(baa_dist_list)
-        diff = max_baa - min_baa
+        aa_names = [name for name in defs.aa_fg[second.sequence]
+                    if name in HB_ATOMS]
+        aa_coordinates = second.coordinates(name=aa_names)
+        base_coordinates = self.coordinates(name=defs.NAbaseheavyatoms[self.sequence])
+        if not len(aa_coordinates) or not len(base_coordinates):
+            return False
+
+        tree = sp.cKDTree(aa_coordinates)
+        n = tree.query_ball_point(base_coordinates, min_distance,
+                                  return_length=True).sum()
+        return bool(n > min_bonds)
+
+    def stacking_tilt(self, aa_residue, aa_coordinates):
+        names = [aa_atom.name for aa_atom in
+                 aa_residue.atoms(name=defs.aa_fg[aa_residue.sequence])]
+        baa_dist = np.fromiter((aa_coordinates[key][2] for key in names),
+                               dtype=np.float64, count=len(names))
+        diff = np.ptp(baa_dist)
         #print aa_residue.unit_id(), diff
         if diff <= defs.tilt_cutoff[aa_residue.sequence]:
             return "stacked"
@@ -7,6 +7,7 @@ import itertools as it
 from fr3d.data.base import EntitySelector
 from fr3d.data.base import CoordinateTree
 from fr3d.data.pairs import Pairs
+from fr3d.data.components import infer_amino_acid_hydrogens_batched
 from fr3d.unit_ids import encode
 
 
@@ -70,11 +71,11 @@ class Structure(object):
             residue.infer_NA_hydrogens()
 
     def infer_amino_acid_hydrogens(self):
-        """ Infers hydrogen atoms for all residues.
+        """ Infers hydrogen atoms for all residues, placing those of each kind
+        of amino acid together.
         """
 
-        for residue in self._residues:
-            residue.infer_amino_acid_hydrogens()
+        infer_amino_acid_hydrogens_batched(self._residues)
 
     def residue(self, unit_id):
         """Get a component by unit id or index. If there is no component at the
@@ -4,7 +4,96 @@ coordinates.
 
 import numpy
 from fr3d.geometry.RMSD import sumsquarederror
-from fr3d.geometry.RMSD import RMSD
+
+
+def rotation_from_svd(V, Wt):
+    """Build the rotation matrix Wt' * I * V' from the singular value
+    decomposition of the covariance matrix. I is the identity, unless that
+    would give a reflection, in which case its last entry is -1. As I is
+    diagonal it is applied by scaling the last column of Wt'.
+
+    :V: The left singular vectors of the covariance matrix.
+    :Wt: The transposed right singular vectors of the covariance matrix.
+    :returns: The 3x3 rotation matrix, as a numpy matrix.
+    """
+
+    d = numpy.linalg.det(numpy.dot(Wt.T, V.T))
+    if numpy.isclose(d, -1.0):
+        return numpy.asmatrix(numpy.dot(Wt.T * [1.0, 1.0, d], V.T))
+    return numpy.asmatrix(numpy.dot(Wt.T, V.T))
+
+
+def best_rotation_only(dev1, dev2):
+    """Find the rotation matrix which optimally superimposes the centered
+    points dev1 onto the centered points dev2, without computing the moved
+    coordinates or the RMSD. This is for callers which only need the
+    rotation.
+
+    :dev1: A numpy array of (n, 3) coordinates with their mean subtracted.
+    :dev2: A numpy array of (n, 3) coordinates with their mean subtracted.
+    :returns: The 3x3 rotation matrix, as a numpy matrix.
+    """
+
+    # the 3x3 covariance matrix, A
+    A = numpy.dot(dev2.T, dev1)
+
+    # V and Wt are 3x3 orthonormal bases, diagS is the diagonal elements of
+    # a 3x3 diagonal matrix, S, in regular SVD.  In SVD, recall that the
+    # Covariance matrix, A, is A=V*S*transpose(W) (matrix multiplication).
+    V, diagS, Wt = numpy.linalg.svd(A)
+    return rotation_from_svd(V, Wt)
+
+
+"""The largest number of points for which besttransformation uses
+best_rotation_quaternion instead of the SVD. Fewer than 3 points never
+determine a unique rotation, so those always use the SVD."""
+SMALL_SUPERPOSITION = 8
+
+"""How close, relative to the largest, the two largest eigenvalues of Horn's
+matrix may be before the rotation is taken as not unique."""
+QUATERNION_GAP = 1e-8
+
+
+def best_rotation_quaternion(dev1, dev2):
+    """Find the same rotation as best_rotation_only using Horn's quaternion
+    method. The rotation is the unit quaternion which is the eigenvector of
+    the largest eigenvalue of a symmetric 4x4 matrix built from the
+    covariance matrix. It is always a proper rotation, so no reflection check
+    is needed, and for a few points it is faster than the SVD.
+
+    When the largest eigenvalue is not clearly separated, as for collinear
+    or coincident points, many rotations fit equally well. Then this gives
+    the rotation best_rotation_only picks, so the result does not depend on
+    which method is used.
+
+    :dev1: A numpy array of (n, 3) coordinates with their mean subtracted.
+    :dev2: A numpy array of (n, 3) coordinates with their mean subtracted.
+    :returns: The 3x3 rotation matrix, as a numpy matrix.
+    """
+
+    (Sxx, Sxy, Sxz), (Syx, Syy, Syz), (Szx, Szy, Szz) = \
+        numpy.dot(dev1.T, dev2).tolist()
+    N = numpy.array([
+        [Sxx + Syy + Szz, Syz - Szy, Szx - Sxz, Sxy - Syx],
+        [Syz - Szy, Sxx - Syy - Szz, Sxy + Syx, Szx + Sxz],
+        [Szx - Sxz, Sxy + Syx, Syy - Sxx - Szz, Syz + Szy],
+        [Sxy - Syx, Szx + Sxz, Syz + Szy, Szz - Sxx - Syy]])
+
+    # eigh sorts the eigenvalues in ascending order
+    values, vectors = numpy.linalg.eigh(N)
+    if values[3] - values[2] <= QUATERNION_GAP * abs(values[3]):
+        return best_rotation_only(dev1, dev2)
+    q0, q1, q2, q3 = vectors[:, 3].tolist()
+
+    # this is the transpose of the matrix which rotates dev1 onto dev2, as
+    # the points are rows which are multiplied on the right
+    return numpy.asmatrix([
+        [q0*q0 + q1*q1 - q2*q2 - q3*q3, 2*(q1*q2 + q0*q3),
+         2*(q1*q3 - q0*q2)],
+        [2*(q1*q2 - q0*q3), q0*q0 - q1*q1 + q2*q2 - q3*q3,
+         2*(q2*q3 + q0*q1)],
+        [2*(q1*q3 + q0*q2), 2*(q2*q3 - q0*q1),
+         q0*q0 - q1*q1 - q2*q2 + q3*q3]])
 
 
 def besttransformation(set1, set2):
@@ -30,15 +119,15 @@ def besttransformation(set1, set2):
     length = len(set1)
     assert length > 0, 'Must not give empty matrices'
 
+    # Convert both sets once, so the steps below work on float arrays
+    set1 = numpy.asarray(set1, dtype=numpy.float64)
+    set2 = numpy.asarray(set2, dtype=numpy.float64)
+
     # Translation Step is beginning.
-    # These add all x_{ij}'s, y_{ij}'s, z_{ij}'s for each element in
-    # setj j=1,2
-    # i=1,2,3,..length
-    # /float(length) divides by length
     # This creates a [mean x_j, mean y_j, mean z_j] for both sets of
     # coordinates setj j=1, or 2, or the centroid of both sets.
-    mean1 = numpy.sum(set1, axis=0) / float(length)
-    mean2 = numpy.sum(set2, axis=0) / float(length)
+    mean1 = numpy.mean(set1, axis=0)
+    mean2 = numpy.mean(set2, axis=0)
 
     # Next,
     # Subtract x_{ij} by the mean of x_j's. Here i=1,2,..length.
@@ -49,46 +138,62 @@ def besttransformation(set1, set2):
     # the origin of the coordinate system.
     # Translation Step is now completed.
 
-    # Begin Step to Compute the 3X3 Covariance Matrix, A.
-    A = numpy.dot(numpy.transpose(dev2), dev1)
-    # Covariance Matrix, A, is now calculated
-
-    # Begin of the Computation of the optimal rotation matrix using
-    # Singular Value Decomposition (SVD)
-    V, diagS, Wt = numpy.linalg.svd(A)
-    # V and Wt are 3x3 orthonormal bases, diagS is the diagonal elements of
-    # a 3x3 diagonal matrix, S, in regular SVD.  In SVD, recall that the
-    # Covariance matrix, A, is A=V*S*transpose(W) (matrix multiplication).
-    #S=numpy.diag(diagS)
-    #A=numpy.dot(V,numpy.dot(S,Wt)
-
-    # The next step is to decide whether we need to correct our rotation
-    # matrix to ensure a right-handed coordinate system
-    # we just need to check for reflections and then produce
-    # the rotation.  V and Wt are orthonormal, so their det's
-    # are +/-1.
-    I = numpy.matrix(numpy.identity(3))
-    d = numpy.linalg.det(numpy.dot(numpy.transpose(Wt), numpy.transpose(V)))
-    if numpy.isclose(d, -1.0):
-        I[2, 2] = d
+    # Compute the optimal rotation matrix using Singular Value Decomposition
+    # (SVD) of the covariance matrix, correcting it if needed to ensure a
+    # right-handed coordinate system. For a few points the quaternion method
+    # gives the same rotation with less overhead.
+    if 3 <= length <= SMALL_SUPERPOSITION:
+        U = best_rotation_quaternion(dev1, dev2)
+    else:
+        U = best_rotation_only(dev1, dev2)
 
     # End of the Computation of the optimal rotation matrix
 
-    #The transformation matrix, U, is now V*Wt
-    U = numpy.dot(numpy.dot(numpy.transpose(Wt), I), numpy.transpose(V))
-
     # rotate and translate the molecule
     #sel2 = numpy.dot((set2 - Mean2), U)
     new1 = numpy.dot(dev1, U)
     new2 = dev2
-    rmsd = RMSD(new1, new2)
     sse = sumsquarederror(new1, new2)
+    rmsd = numpy.sqrt(sse / length)
 
     #Return the transformation matrix, the new coordinates for the two
     #set of coordinates, respectively.
     return U, new1, mean1, rmsd, sse, mean2
 
 
+def besttransformation_batch(sets1, sets2):
+    """Find the rotation matrices which optimally superimpose many pairs of
+    point sets at once. This gives the same rotations as calling
+    besttransformation on each pair, but computes all of the covariance
+    matrices and singular value decompositions as stacked arrays, which
+    avoids the per call overhead when there are many small sets.
+
+    :sets1: An array of (b, n, 3) coordinates.
+    :sets2: An array of (b, n, 3) coordinates.
+    :returns: A (b, 3, 3) array, the rotation for each pair of sets.
+    """
+
+    sets1 = numpy.asarray(sets1, dtype=float)
+    sets2 = numpy.asarray(sets2, dtype=float)
+    assert sets1.shape == sets2.shape, 'Shapes must match'
+    assert sets1.ndim == 3 and sets1.shape[2] == 3, 'Must give (b, n, 3) sets'
+    assert sets1.shape[1] > 0, 'Must not give empty matrices'
+
+    dev1 = sets1 - sets1.mean(axis=1, keepdims=True)
+    dev2 = sets2 - sets2.mean(axis=1, keepdims=True)
+    A = numpy.einsum('bni,bnj->bij', dev2, dev1)
+    V, diagS, Wt = numpy.linalg.svd(A)
+
+    # as in rotation_from_svd, flip the last column of Wt' where the
+    # rotation would otherwise be a reflection
+    W = Wt.transpose(0, 2, 1)
+    Vt = V.transpose(0, 2, 1)
+    d = numpy.linalg.det(numpy.matmul(W, Vt))
+    flip = numpy.isclose(d, -1.0)
+    W[flip, :, 2] *= d[flip, numpy.newaxis]
+    return numpy.matmul(W, Vt)
+
+
 def besttransformation_weighted(set1, set2, weights=[1.0]):
     """This finds the besttransformation rotation matrix with predetermined
     weights.  The weights are used to give some coordinates more influence than
@@ -98,25 +203,22 @@ def besttransformation_weighted(set1, set2, weights=[1.0]):
     assert len(set1) == len(set2)
     length = len(set1)
     assert length > 0
+    # the diagonal of the weight matrix, it scales the rows of dev1
     if len(weights) == len(set1):
-        diagonal = numpy.diag(weights)
+        diagonal = numpy.asarray(weights, dtype=float)
     else:
-        diagonal = numpy.diag(numpy.ones(len(set1)))
-    mean1 = numpy.sum(set1, axis=0) / float(length)
-    mean2 = numpy.sum(set2, axis=0) / float(length)
+        diagonal = numpy.ones(len(set1))
+    set1 = numpy.asarray(set1, dtype=numpy.float64)
+    set2 = numpy.asarray(set2, dtype=numpy.float64)
+    mean1 = numpy.mean(set1, axis=0)
+    mean2 = numpy.mean(set2, axis=0)
     dev1 = set1 - mean1
     dev2 = set2 - mean2
-    A = numpy.dot(numpy.transpose(dev2), numpy.dot(diagonal, dev1))
-    V, diagS, Wt = numpy.linalg.svd(A)
-    I = numpy.matrix(numpy.identity(3))
-    d = numpy.linalg.det(numpy.dot(numpy.transpose(Wt), numpy.transpose(V)))
-    if numpy.isclose(d, -1.0):
-        I[2, 2] = d
-    U = numpy.dot(numpy.dot(numpy.transpose(Wt), I), numpy.transpose(V))
+    U = best_rotation_only(diagonal[:, numpy.newaxis] * dev1, dev2)
     new1 = numpy.dot(dev1, U)
     new2 = dev2
-    rmsd = RMSD(new1, new2)
     sse = sumsquarederror(new1, new2)
+    rmsd = numpy.sqrt(sse / length)
     rotation_matrix = U
     return rotation_matrix, new1, mean1, rmsd, sse
 
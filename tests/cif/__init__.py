@@ -16,3 +16,19 @@ class ReaderTest(TestCase):
     def setUp(self):
         self.cif = self.__class__.cif
         self.structure = self.__class__.structure
+
+
+class TextReaderTest(TestCase):
+    """Like ReaderTest, but reads the file in text mode, which is how the
+    reader parses files, and does not build the structure.
+    """
+
+    name = None
+
+    @classmethod
+    def setUpClass(cls):
+        with open(os.path.join('files', cls.name + '.cif'), 'r') as raw:
+            cls.cif = Cif(raw)
+
+    def setUp(self):
+        self.cif = self.__class__.cif
@@ -9,6 +9,7 @@ from fr3d.cif.reader import MissingColumn
 from fr3d.cif.reader import MissingBlockException
 
 from tests.cif import ReaderTest
+from tests.cif import TextReaderTest
 
 
 class SimpleCIFTest(ReaderTest):
@@ -72,6 +73,36 @@ class SimpleCIFTest(ReaderTest):
         assert self.cif.has_table('bob') is False
 
 
+class CachedCIFTest(TextReaderTest):
+    name = '1FAT'
+
+    def test_caches_tables(self):
+        val = self.cif.table('_pdbx_poly_seq_scheme')
+        assert val is self.cif.pdbx_poly_seq_scheme
+
+    def test_caches_symmetry_operators_by_asym_id(self):
+        assert self.cif.operators('A') is self.cif.operators('A')
+
+
+class CachedTableTest(TextReaderTest):
+    name = '1FAT'
+
+    def setUp(self):
+        self.data = self.__class__.cif.table('pdbx_poly_seq_scheme')
+
+    def test_gets_a_typed_column(self):
+        val = self.data.int_column('seq_id')[0:3]
+        np.testing.assert_array_equal(val, np.array([1, 2, 3]))
+
+    def test_gets_a_float_column(self):
+        val = self.data.float_column('seq_id')[0:3]
+        np.testing.assert_array_equal(val, np.array([1.0, 2.0, 3.0]))
+
+    def test_caches_typed_columns(self):
+        assert self.data.int_column('seq_id') is \
+            self.data.int_column('seq_id')
+
+
 class SimpleTableTest(ReaderTest):
     name = '1FAT'
 
@@ -0,0 +1,17 @@
+import os
+from unittest import TestCase
+
+from fr3d.cif.reader import Cif
+
+
+class StructureTest(TestCase):
+    """Parses the structure in files/<name>.cif once for all tests in the
+    class.
+    """
+
+    name = None
+
+    @classmethod
+    def setUpClass(cls):
+        with open(os.path.join('files', cls.name + '.cif'), 'r') as raw:
+            cls.structure = Cif(raw).structure()
@@ -5,6 +5,8 @@ import numpy as np
 from fr3d.data import Atom
 from fr3d.data.base import AtomProxy
 
+from tests.data import StructureTest
+
 
 class AtomProxyTest(TestCase):
     def setUp(self):
@@ -153,3 +155,67 @@ class AtomProxyTest(TestCase):
         self.proxy.define('bob', ['a1', 'c2'])
         self.proxy.define('other', ['c2', 'b1'])
         assert sorted(self.proxy.definitions()) == sorted(['bob', 'other'])
+
+    def test_can_get_several_centers_at_once(self):
+        self.proxy.define('bob', ['a1', 'c2'])
+        val = self.proxy.bulk(['c2', 'bob', 'a1'])
+        ans = np.array([[0.0, 1.0, 0.0], [0.5, 0.5, 0.0], [1.0, 0.0, 0.0]])
+        np.testing.assert_array_almost_equal(ans, val)
+
+    def test_getting_several_centers_with_a_missing_one_raises_error(self):
+        self.assertRaises(KeyError, self.proxy.bulk, ['a1', '3'])
+
+
+class IndexedAtomProxyTest(TestCase):
+    def setUp(self):
+        self.atoms = [
+            Atom(name='a1', x=1.0, y=0.0, z=0.0),
+            Atom(name='a2', x=2.0, y=0.0, z=0.0),
+            Atom(name='a1', x=3.0, y=0.0, z=0.0),
+        ]
+        self.proxy = AtomProxy(self.atoms)
+        self.proxy.setcoordinates(np.array([a.coordinates() for a in self.atoms]),
+                                  [a.name for a in self.atoms])
+
+    def test_can_get_atom_value(self):
+        val = self.proxy['a2']
+        np.testing.assert_almost_equal([2.0, 0.0, 0.0], val)
+
+    def test_averages_atoms_with_the_same_name(self):
+        val = self.proxy['a1']
+        np.testing.assert_almost_equal([2.0, 0.0, 0.0], val)
+
+    def test_gives_a_copy_of_the_coordinates(self):
+        self.proxy['a2'][0] = 10.0
+        np.testing.assert_almost_equal([2.0, 0.0, 0.0], self.proxy['a2'])
+
+    def test_sees_atoms_added_later(self):
+        self.atoms.append(Atom(name='b1', x=0.0, y=1.0, z=0.0))
+        self.assertTrue('b1' in self.proxy)
+        np.testing.assert_almost_equal([0.0, 1.0, 0.0], self.proxy['b1'])
+
+
+    def test_sees_an_atom_replaced_by_another(self):
+        self.atoms[1] = Atom(name='q', x=0.0, y=0.0, z=5.0)
+        self.assertTrue('q' in self.proxy)
+        self.assertFalse('a2' in self.proxy)
+        np.testing.assert_almost_equal([0.0, 0.0, 5.0], self.proxy['q'])
+
+
+class LoadedAtomProxyTest(StructureTest):
+    name = '1GID'
+
+    def setUp(self):
+        self.residue = self.structure.residue('1GID|1|A|G|108')
+
+    def test_indexes_the_atoms_of_a_parsed_residue(self):
+        self.assertTrue(self.residue.centers.__row_index__() is not None)
+
+    def test_index_gives_the_atom_coordinates(self):
+        names = ['N1', 'C2', "C1'"]
+        val = self.residue.centers.bulk(names)
+        atoms = dict((atom.name, atom.coordinates())
+                     for atom in self.residue.atoms())
+        ans = [atoms[name] for name in names]
+        np.testing.assert_array_equal(val, ans)
+        self.assertTrue("C1'" in self.residue.centers)
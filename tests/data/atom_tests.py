@@ -33,6 +33,12 @@ class AtomTest(ut.TestCase):
         val = self.atom.distance(Atom(x=1, y=0, z=0))
         self.assertEqual(2.0, val)
 
+    def test_can_create_moved_copies_from_an_array(self):
+        moved = Atom.from_arrays(np.array([[1.0, 2.0, 3.0]]), [self.atom])
+        self.assertEqual(self.atom.unit_id(), moved[0].unit_id())
+        np.testing.assert_array_equal(moved[0].coordinates(),
+                                      np.array([1.0, 2.0, 3.0]))
+
 
 class AlternativeAtomTest(ut.TestCase):
     def setUp(self):
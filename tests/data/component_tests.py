@@ -8,9 +8,18 @@ from numpy.testing import assert_array_equal
 
 from fr3d.data import Atom
 from fr3d.data import Component
+from fr3d.data.components import angle_between_vectors
+from fr3d.data.components import angle_between_vectors_batched
+from fr3d.data.components import apply_3x3
+from fr3d.data.components import cross_product
+from fr3d.data.components import AMINO_ACID_HYDROGENS
+from fr3d.data.components import BATCHED_HYDROGENS
+from fr3d.data.components import infer_amino_acid_hydrogens_batched
 from fr3d.cif.reader import Cif
 from fr3d import definitions as defs
 
+from tests.data import StructureTest
+
 
 class BasicTest(ut.TestCase):
     def setUp(self):
@@ -43,6 +52,13 @@ class BasicTest(ut.TestCase):
         ans = "1GID|1|A|C|50||||6_555"
         self.assertEquals(val, ans)
 
+    def test_unit_id_follows_changed_fields(self):
+        self.component.unit_id()
+        self.component.alt_id = 'B'
+        val = self.component.unit_id()
+        ans = "1GID|1|A|C|50||B||6_555"
+        self.assertEquals(val, ans)
+
     def test_can_get_filtered_atoms(self):
         val = list(self.component.atoms(type='C'))
         ans = self.atoms[0:2]
@@ -79,12 +95,33 @@ class BasicTest(ut.TestCase):
         val = self.component.is_complete([1, 2, 10], key='component_number')
         self.assertFalse(val)
 
+    def test_atoms_share_the_component_coordinates(self):
+        self.atoms[1].x = 5.0
+        val = self.component.coordinates()
+        ans = np.array([[0.0, 0.0, 0.0], [5.0, 0.0, 0.0],
+                        [0.0, 0.0, 0.0], [0.0, 0.0, 0.0]])
+        assert_array_equal(val, ans)
+
+    def test_can_get_coordinates_by_name(self):
+        self.atoms[2].x = 1.0
+        val = self.component.coordinates(name=['a2', 'b1'])
+        ans = np.array([[0.0, 0.0, 0.0], [1.0, 0.0, 0.0]])
+        assert_array_equal(val, ans)
+
     def test_knows_is_equal_to_itself(self):
         self.assertTrue(self.component == self.component)
 
     def test_knows_is_equal_to_equivelant_component(self):
         self.assertTrue(self.component == self.component.select())
 
+    def test_equal_components_have_the_same_hash(self):
+        val = hash(self.component.select())
+        ans = hash(self.component)
+        self.assertEqual(val, ans)
+
+    def test_can_be_found_in_a_set(self):
+        self.assertTrue(self.component.select() in set([self.component]))
+
 
 class SubComponentTest(ut.TestCase):
     def setUp(self):
@@ -113,6 +150,26 @@ class SubComponentTest(ut.TestCase):
         ans = self.atoms[0:2]
         self.assertEquals(ans, val)
 
+    def test_parent_and_selection_see_a_moved_atom(self):
+        self.atoms[0].x = 5.0
+        ans = np.array([5.0, 0.0, 0.0])
+        assert_array_equal(self.component.coordinates()[0], ans)
+        assert_array_equal(self.component.centers['a1'], ans)
+        assert_array_equal(self.sub.centers['a1'], ans)
+
+    def test_selection_coordinates_see_a_moved_atom(self):
+        self.atoms[0].x = 5.0
+        val = self.sub.coordinates(name='a1')
+        ans = np.array([[5.0, 0.0, 0.0]])
+        assert_array_equal(val, ans)
+        assert_array_equal(self.sub.coordinates()[0], ans[0])
+
+    def test_coordinates_see_a_replaced_atom(self):
+        self.component._atoms[0] = Atom(name='q', x=0.0, y=0.0, z=7.0)
+        val = self.component.coordinates(name='q')
+        ans = np.array([[0.0, 0.0, 7.0]])
+        assert_array_equal(val, ans)
+
 
 class CenterTest(ut.TestCase):
     def setUp(self):
@@ -150,6 +207,17 @@ class TransformTest(ut.TestCase):
         ans = [1.0, 96.240, -1.0]
         self.assertEquals(ans, val)
 
+    def test_transforms_all_atoms_like_each_atom(self):
+        trans = np.array([[0.0, -1.0, 0.0, 2.5],
+                          [1.0, 0.0, 0.0, -1.0],
+                          [0.0, 0.0, 1.0, 4.0],
+                          [0.0, 0.0, 0.0, 1.0]])
+        residue = self.residue.transform(trans)
+        ans = [atom.transform(trans).coordinates()
+               for atom in self.residue.atoms()]
+        val = residue.coordinates()[0:len(ans)]
+        assert_array_almost_equal(val, ans)
+
     def test_preserves_unit_id(self):
         trans = np.array([[1.0, 0.0, 0.0, 0.0],
                           [0.0, -1.0, 0.0, 97.240],
@@ -336,6 +404,84 @@ class AtomsWithin(ut.TestCase):
                                            to=['N1', 'N3'], using=['C4', 'N3'])
         self.assertFalse(val)
 
+    def test_can_require_several_atoms_within(self):
+        val = self.component1.atoms_within(self.component2, 2.5,
+                                           min_number=2)
+        self.assertTrue(val)
+
+    def test_knows_if_too_few_atoms_are_within(self):
+        val = self.component1.atoms_within(self.component2, 1.0,
+                                           min_number=2)
+        self.assertFalse(val)
+
+    def test_knows_nothing_is_within_missing_atoms(self):
+        val = self.component1.atoms_within(self.component2, 1.0,
+                                           using=['P'])
+        self.assertFalse(val)
+
+
+class DistanceTest(ut.TestCase):
+    def setUp(self):
+        self.component1 = Component([
+            Atom(name='N9', x=3.0, y=3.0, z=3.0),
+            Atom(name='C4', x=1.0, y=1.0, z=1.0),
+        ])
+        self.component2 = Component([
+            Atom(name='N1', x=0.0, y=-1.0, z=0.0),
+            Atom(name='N3', x=0.0, y=-3.0, z=0.0),
+        ])
+
+    def test_computes_center_distance(self):
+        val = self.component1.distance(self.component2)
+        ans = np.sqrt(4.0 + 16.0 + 4.0)
+        self.assertAlmostEqual(val, ans)
+
+    def test_computes_atom_distance(self):
+        val = self.component1.distance(self.component2, using='C4', to='N1')
+        ans = np.sqrt(1.0 + 4.0 + 1.0)
+        self.assertAlmostEqual(val, ans)
+
+
+class HydrogenBondTest(StructureTest):
+    name = '1AQ3'
+
+    @classmethod
+    def setUpClass(cls):
+        super(HydrogenBondTest, cls).setUpClass()
+        cls.base = cls.structure.residue('1AQ3|1|R|A|12||||P_1')
+
+    def test_knows_if_there_are_enough_hydrogen_bonds(self):
+        aa = self.structure.residue('1AQ3|1|A|SER|47||||P_1')
+        self.assertTrue(self.base.enough_hydrogen_bonds(aa))
+
+    def test_knows_if_there_are_not_enough_hydrogen_bonds(self):
+        aa = self.structure.residue('1AQ3|1|A|SER|47||||P_1')
+        self.assertFalse(self.base.enough_hydrogen_bonds(aa, min_bonds=10))
+
+    def test_knows_if_a_distant_amino_acid_has_no_hydrogen_bonds(self):
+        aa = self.structure.residue('1AQ3|1|C|SER|47||||P_1')
+        self.assertFalse(self.base.enough_hydrogen_bonds(aa))
+
+
+class StackingTiltTest(ut.TestCase):
+    def setUp(self):
+        self.names = defs.aa_fg['PHE']
+        self.residue = Component([], sequence='A')
+
+    def aa(self, heights):
+        atoms = [Atom(name=name, x=float(i), y=0.0, z=z)
+                 for i, (name, z) in enumerate(zip(self.names, heights))]
+        aa = Component(atoms, sequence='PHE')
+        return aa, dict((atom.name, atom.coordinates()) for atom in atoms)
+
+    def test_knows_a_flat_amino_acid_is_stacked(self):
+        aa, coordinates = self.aa([3.0, 3.2, 3.4, 3.1, 3.0, 3.3])
+        self.assertEquals('stacked', self.residue.stacking_tilt(aa, coordinates))
+
+    def test_knows_a_tilted_amino_acid_is_not_stacked(self):
+        aa, coordinates = self.aa([1.0, 2.0, 3.0, 4.0, 5.0, 6.0])
+        self.assertEquals(None, self.residue.stacking_tilt(aa, coordinates))
+
 
 class AtomTest(ut.TestCase):
     def setUp(self):
@@ -452,3 +598,173 @@ class RealDataTransformationTest(ut.TestCase):
         matrix = residue.standard_transformation()
         trans = residue.transform(matrix)
         assert_array_almost_equal(trans.centers['base'], [0, 0, 0])
+
+
+class SelectTest(StructureTest):
+    name = '1GID'
+
+    def test_selecting_keeps_the_rotation_matrix(self):
+        residue = self.structure.residue('1GID|1|A|G|108')
+        base = residue.select(name=defs.NAbaseheavyatoms['G'])
+        self.assertIs(base.rotation_matrix, residue.rotation_matrix)
+        assert_array_equal(base.centers['base'], residue.centers['base'])
+
+    def test_selecting_does_not_add_hydrogens(self):
+        residue = self.structure.residue('1GID|1|A|G|108')
+        base = residue.select(name=defs.NAbaseheavyatoms['G'])
+        self.assertEquals(len(defs.NAbaseheavyatoms['G']), len(base))
+
+
+class SharedCoordinatesTest(StructureTest):
+    name = '1GID'
+
+    def test_parsed_residues_own_their_atoms(self):
+        val = [r.unit_id() for r in self.structure.residues()
+               if r._shared_atoms is None]
+        self.assertEquals(val, [])
+
+    def test_nucleotides_own_their_hydrogens(self):
+        residue = self.structure.residue('1GID|1|A|G|108')
+        self.assertTrue('H1' in [atom.name for atom in residue.atoms()])
+        self.assertTrue(residue._shared_atoms is not None)
+
+    def test_coordinates_by_name_match_the_atoms(self):
+        residue = self.structure.residue('1GID|1|A|C|109')
+        names = ['N1', 'C2', "C1'"]
+        val = residue.coordinates(name=names)
+        ans = [atom.coordinates() for atom in residue.atoms()
+               if atom.name in names]
+        assert_array_equal(val, ans)
+
+    def test_coordinates_by_name_follow_a_moved_atom(self):
+        residue = self.structure.residue('1GID|1|A|C|109')
+        atom = list(residue.atoms(name='N1'))[0]
+        original = atom.x
+        try:
+            atom.x = 100.0
+            self.assertEquals(residue.coordinates(name='N1')[0][0], 100.0)
+            self.assertEquals(residue.coordinates()[0][0],
+                              list(residue.atoms())[0].x)
+        finally:
+            atom.x = original
+
+
+class SharedAminoAcidCoordinatesTest(StructureTest):
+    name = '1FAT'
+
+    def test_amino_acids_own_their_hydrogens(self):
+        self.structure.infer_amino_acid_hydrogens()
+        residues = list(self.structure.residues(sequence='LEU'))
+        self.assertTrue('HG' in [atom.name for atom in residues[0].atoms()])
+        val = [r.unit_id() for r in residues if r._shared_atoms is None]
+        self.assertEquals(val, [])
+
+
+class TranslateRotateTest(StructureTest):
+    name = '1GID'
+
+    @classmethod
+    def setUpClass(cls):
+        super(TranslateRotateTest, cls).setUpClass()
+        cls.residue = cls.structure.residue('1GID|1|A|G|108')
+        cls.other = cls.structure.residue('1GID|1|A|C|109')
+
+    def test_moves_every_atom(self):
+        val = self.residue.translate_rotate(self.other)
+        ans = [self.residue.translate_rotate_atom(atom).coordinates()
+               for atom in self.other.atoms()]
+        assert_array_almost_equal(val, ans)
+
+    def test_moves_a_component_like_each_atom(self):
+        val = self.residue.translate_rotate_component(self.other)
+        ans = [self.residue.translate_rotate_atom(atom).coordinates()
+               for atom in self.other.atoms()]
+        assert_array_almost_equal(val.coordinates()[0:len(ans)], ans)
+        self.assertEquals([a.name for a in self.other.atoms()],
+                          [a.name for a in val.atoms()][0:len(ans)])
+
+    def test_reuses_the_standard_transformation(self):
+        matrix = self.residue.standard_transformation()
+        self.assertIs(matrix, self.residue.standard_transformation())
+        self.assertFalse(matrix.flags.writeable)
+
+    def test_translate_moves_every_coordinate(self):
+        coordinates = self.other.coordinates()
+        val = self.residue.translate(coordinates)
+        ans = self.residue.translate_rotate(self.other)
+        assert_array_almost_equal(val, ans)
+
+
+class AngleTest(ut.TestCase):
+    def test_computes_the_angle_between_vectors(self):
+        val = angle_between_vectors(np.array([1.0, 0.0, 0.0]),
+                                    np.array([1.0, 1.0, 0.0]))
+        assert_almost_equal(val, 45.0)
+
+    def test_computes_angles_between_rows_of_vectors(self):
+        vecs1 = [[1.0, 0.0, 0.0], [0.0, 2.0, 0.0], [0.0, 0.0, 1.0]]
+        vecs2 = [[1.0, 1.0, 0.0], [0.0, -1.0, 0.0], [0.0, 0.0, 3.0]]
+        val = angle_between_vectors_batched(vecs1, vecs2)
+        assert_array_almost_equal(val, [45.0, 180.0, 0.0])
+
+    def test_computes_the_cross_product(self):
+        val = cross_product(np.array([1.0, 2.0, 3.0]), np.array([-2.0, 0.5, 4.0]))
+        ans = np.cross([1.0, 2.0, 3.0], [-2.0, 0.5, 4.0])
+        assert_array_almost_equal(val, ans)
+
+    def test_applies_a_3x3_matrix_like_dot(self):
+        matrix = np.matrix([[0.0, -1.0, 0.0], [1.0, 0.0, 0.0], [0.0, 0.0, 2.0]])
+        vector = np.array([[1.0, 2.0, 3.0]])
+        val = apply_3x3(matrix, vector)
+        assert_array_almost_equal(val, np.dot(np.asarray(matrix), vector[0]))
+
+
+class AminoAcidHydrogenTableTest(ut.TestCase):
+    def test_hydrogens_are_placed_before_they_are_used(self):
+        for sequence, steps in AMINO_ACID_HYDROGENS.items():
+            placed = set()
+            for place, names, bond, hydrogens in steps:
+                for name in names:
+                    if name.startswith('H'):
+                        self.assertIn(name, placed, sequence)
+                placed.update(h for h in hydrogens if h is not None)
+
+
+class BatchedAminoAcidHydrogenTest(StructureTest):
+    name = '1FAT'
+
+    def setUp(self):
+        # hydrogens are added to selections, so the parsed residues are
+        # left unchanged for the next test
+        leucines = list(self.structure.residues(sequence='LEU'))[0:5]
+        self.residues = [residue.select() for residue in leucines]
+
+    def test_batched_functions_match_the_single_ones(self):
+        points = np.array([[[1.0, 0.2, 0.0], [0.0, 0.0, 0.0], [0.1, 1.0, 0.3]],
+                           [[2.0, 1.0, 1.0], [1.0, 2.0, 0.0], [0.0, 1.0, 3.0]]])
+        for single, batched in BATCHED_HYDROGENS.items():
+            val = np.array(batched(*points.transpose(1, 0, 2)))
+            for index, triple in enumerate(points):
+                ans = np.array(single(*triple))
+                assert_array_almost_equal(val[..., index, :], ans)
+
+    def test_places_the_same_hydrogens_as_one_at_a_time(self):
+        ans = []
+        for residue in self.residues:
+            single = residue.select()
+            single.infer_amino_acid_hydrogens()
+            ans.append(single)
+        infer_amino_acid_hydrogens_batched(self.residues)
+        for residue, single in zip(self.residues, ans):
+            self.assertEquals([a.name for a in single.atoms()],
+                              [a.name for a in residue.atoms()])
+            assert_array_almost_equal(single.coordinates(),
+                                      residue.coordinates())
+
+    def test_skips_only_the_hydrogens_needing_a_missing_atom(self):
+        atoms = [a for a in self.residues[0].atoms() if a.name != 'CD1']
+        residue = Component(atoms, sequence='LEU')
+        residue.infer_amino_acid_hydrogens()
+        val = [a.name for a in residue.atoms() if a.name.startswith('H')]
+        ans = ['HA', 'HB2', 'HB3', 'HG', 'HD21', 'HD22', 'HD23']
+        self.assertEquals(val, ans)
@@ -4,6 +4,10 @@ from numpy import array
 from numpy.testing import assert_almost_equal
 
 from fr3d.geometry.superpositions import besttransformation
+from fr3d.geometry.superpositions import besttransformation_weighted
+from fr3d.geometry.superpositions import besttransformation_batch
+from fr3d.geometry.superpositions import best_rotation_only
+from fr3d.geometry.superpositions import best_rotation_quaternion
 from fr3d.geometry.angleofrotation import angle_of_rotation
 
 class TransformationTest(TestCase):
@@ -116,4 +120,101 @@ class TransformationTest(TestCase):
         meana = numpy.dot(J,a)/4.0
         b = numpy.dot(a-meana,ans)
         rotation, _, _, _, _ = besttransformation(a, b)
-        assert_almost_equal(ans, rotation)
\ No newline at end of file
+        assert_almost_equal(ans, rotation)
+
+
+class ReflectionTest(TestCase):
+
+    def setUp(self):
+        self.a = array([[3.0000, 7.0000, 1.0000],
+                        [5.0000, 9.0000, 2.0000],
+                        [7.0000, 4.0000, 6.0000],
+                        [1.0000, 1.0000, 1.0000]])
+        self.b = self.a * array([1.0, 1.0, -1.0])
+
+    def test_never_gives_a_reflection(self):
+        rotation = besttransformation(self.a, self.b)[0]
+        assert_almost_equal(numpy.linalg.det(rotation), 1.0)
+
+    def test_accepts_integer_lists(self):
+        val = besttransformation(self.a.astype(int).tolist(),
+                                 self.b.astype(int).tolist())[0]
+        ans = besttransformation(self.a, self.b)[0]
+        assert_almost_equal(val, ans)
+
+    def test_rotation_only_matches_besttransformation(self):
+        val = best_rotation_only(self.a - self.a.mean(axis=0),
+                                 self.b - self.b.mean(axis=0))
+        ans = besttransformation(self.a, self.b)[0]
+        assert_almost_equal(val, ans)
+
+    def test_quaternion_matches_svd_rotation(self):
+        dev1 = self.a - self.a.mean(axis=0)
+        for b in (self.b, self.a[::-1]):
+            dev2 = b - b.mean(axis=0)
+            val = best_rotation_quaternion(dev1, dev2)
+            ans = best_rotation_only(dev1, dev2)
+            assert_almost_equal(val, ans)
+
+    def test_weighted_never_gives_a_reflection(self):
+        rotation = besttransformation_weighted(self.a, self.b,
+                                               [1.0, 2.0, 1.0, 0.5])[0]
+        assert_almost_equal(numpy.linalg.det(rotation), 1.0)
+
+
+class BatchTransformationTest(TestCase):
+
+    def setUp(self):
+        a = array([[3.0000, 7.0000, 1.0000],
+                   [5.0000, 9.0000, 2.0000],
+                   [7.0000, 4.0000, 6.0000],
+                   [1.0000, 1.0000, 1.0000]])
+        theta = numpy.pi/4.0
+        rotation = array([[1.0000, 0.0000, 0.0000],
+                          [0.0000, numpy.cos(theta), -numpy.sin(theta)],
+                          [0.0000, numpy.sin(theta), numpy.cos(theta)]])
+        self.sets1 = array([a, a, a[::-1]])
+        self.sets2 = array([numpy.dot(a, rotation) + 2.0,
+                            a * array([1.0, 1.0, -1.0]),
+                            a])
+
+    def test_gives_the_same_rotations_as_each_pair(self):
+        val = besttransformation_batch(self.sets1, self.sets2)
+        ans = [besttransformation(s1, s2)[0]
+               for s1, s2 in zip(self.sets1, self.sets2)]
+        assert_almost_equal(val, ans)
+
+    def test_never_gives_a_reflection(self):
+        val = numpy.linalg.det(besttransformation_batch(self.sets1,
+                                                        self.sets2))
+        assert_almost_equal(val, numpy.ones(3))
+
+
+class DegenerateTransformationTest(TestCase):
+
+    def svd_rotation(self, a, b):
+        return best_rotation_only(a - a.mean(axis=0), b - b.mean(axis=0))
+
+    def test_single_point_gives_identity(self):
+        rotation = besttransformation(array([[1.0, 2.0, 3.0]]),
+                                      array([[4.0, 5.0, 6.0]]))[0]
+        assert_almost_equal(rotation, numpy.identity(3))
+
+    def test_two_points_give_the_svd_rotation(self):
+        a = array([[0.0, 0.0, 0.0], [1.0, 0.0, 0.0]])
+        b = array([[0.0, 0.0, 0.0], [0.0, 1.0, 0.0]])
+        rotation = besttransformation(a, b)[0]
+        assert_almost_equal(rotation, self.svd_rotation(a, b))
+        assert_almost_equal(numpy.dot([1.0, 0.0, 0.0], rotation),
+                            [[0.0, 1.0, 0.0]])
+
+    def test_collinear_points_give_the_svd_rotation(self):
+        a = array([[0.0, 0.0, 0.0], [1.0, 1.0, 1.0], [2.0, 2.0, 2.0],
+                   [5.0, 5.0, 5.0]])
+        b = array([[1.0, 0.0, 0.0], [1.0, 2.0, 0.0], [1.0, 4.0, 0.0],
+                   [1.0, 10.0, 0.0]])
+        rotation = besttransformation(a, b)[0]
+        assert_almost_equal(rotation, self.svd_rotation(a, b))
+        direction = numpy.dot(array([1.0, 1.0, 1.0]) / numpy.sqrt(3.0),
+                              rotation)
+        assert_almost_equal(direction, [[0.0, 1.0, 0.0]])